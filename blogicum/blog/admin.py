@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Location, Post, Comment
+from .models import Category, Location, Post, Comment, Task
+from .search import search_posts
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -43,6 +44,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('category',)
     list_display_links = ('title',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -52,3 +58,12 @@ class LocationAdmin(admin.ModelAdmin):
     list_display = (
         'name',
     )
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'name', 'payload', 'attempts', 'locked_until', 'error', 'created_at'
+    )
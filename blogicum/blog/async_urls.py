@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import async_views, urls
+
+app_name = 'blog'
+
+# Same names as blog.urls, so reverse() gives the same paths; the views
+# listed first win resolution.
+urlpatterns = [
+    path('', async_views.IndexListView.as_view(), name='index'),
+    path('posts/<int:post_id>/',
+         async_views.PostDetailView.as_view(),
+         name='post_detail'),
+    path('category/<slug:category_slug>/',
+         async_views.CategoryPostsListView.as_view(),
+         name='category_posts'),
+    path('profile/<str:username>/',
+         async_views.ProfileListView.as_view(),
+         name='profile'),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from . import views
+from .instrumentation import current_stats, track_queries
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.BLOG_ASYNC_DB_WORKERS, thread_name_prefix='blog-db'
+            )
+    return _executor
+
+
+def _run_job(func, args):
+    # Each worker thread keeps its own connections; they are closed or
+    # kept by CONN_MAX_AGE just as request_started/finished would do.
+    close_old_connections()
+    try:
+        with track_queries():
+            return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_executor(func, *args):
+    # Unlike sync_to_async(thread_sensitive=True), which runs every sync
+    # view of the process in one thread, up to BLOG_ASYNC_DB_WORKERS
+    # requests query the database at the same time.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(context.run, _run_job, func, args)
+    )
+
+
+def detach(response):
+    # A TemplateResponse returned to the async handler would be rendered
+    # again (a no-op, but in the sync thread), so it is passed on as a
+    # plain response with the same status, headers and cookies.
+    if not hasattr(response, 'render'):
+        return response
+    plain = HttpResponse(response.content, status=response.status_code)
+    plain.headers = response.headers
+    plain.cookies = response.cookies
+    return plain
+
+
+class AsyncViewMixin:
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Django 3.2 only awaits views that look like coroutine functions.
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        return await run_in_db_executor(self.respond, request, args, kwargs)
+
+    def respond(self, request, args, kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            started = time.perf_counter()
+            response.render()
+            stats = current_stats()
+            view_started = getattr(request, 'blog_view_started', None)
+            if stats is not None and view_started is not None:
+                stats.add('view', started - view_started)
+                stats.add('template', time.perf_counter() - started)
+        return detach(response)
+
+
+class IndexListView(AsyncViewMixin, views.IndexListView):
+    pass
+
+
+class CategoryPostsListView(AsyncViewMixin, views.CategoryPostsListView):
+    pass
+
+
+class ProfileListView(AsyncViewMixin, views.ProfileListView):
+    pass
+
+
+class PostDetailView(AsyncViewMixin, views.PostDetailView):
+    pass
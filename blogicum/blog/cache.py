@@ -0,0 +1,201 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+
+from .instrumentation import count_cache
+from .models import Category, Location, User
+from .utils import feed_now, publication_events, shared_cache
+
+VERSION_KEY = 'blog:version:{}'
+PAGE_KEY = 'blog:page:{}'
+CATEGORY_KEY = 'blog:category:{}'
+USER_KEY = 'blog:user:{}'
+PROFILE_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'is_staff', 'date_joined'
+)
+STATS_KEY = 'blog:stats:page_cache_{}'
+# Version of the categories, locations and users that pages show next to
+# the posts; changing one of them bumps this and the row's own version
+# instead of the versions of all its posts.
+RELATED_VERSION = 'related'
+# Bumped by the commands that rewrite stored data of all posts (feed rows,
+# comment counts, the search index); every page and card includes it.
+REBUILD_VERSION = 'rebuild'
+PAGE_VERSION_NAMES = (RELATED_VERSION, REBUILD_VERSION)
+BUMP_CHUNK_SIZE = 500
+# The query parameters cached pages read; the others do not change them.
+PAGE_PARAMS = ('page', 'cursor', 'comments', 'q')
+
+
+def get_cache():
+    return caches[settings.BLOG_CACHE_ALIAS]
+
+
+def cache_timeout(timeout):
+    # The other processes of a process-local cache never see the bumps of
+    # this one, so what it holds must expire soon there.
+    if shared_cache():
+        return timeout
+    local = settings.BLOG_LOCAL_CACHE_TIMEOUT
+    return local if timeout is None else min(timeout, local)
+
+
+def get_versions(*names):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, cache_timeout(None))
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _set_versions(names):
+    version = time.time_ns()
+    cache = get_cache()
+    names = list(names)
+    for start in range(0, len(names), BUMP_CHUNK_SIZE):
+        cache.set_many(
+            {
+                VERSION_KEY.format(name): version
+                for name in names[start:start + BUMP_CHUNK_SIZE]
+            },
+            cache_timeout(None)
+        )
+
+
+def bump_versions(names):
+    # Bump now and once more after commit: a reader that cached the old
+    # rows under the first bump is superseded by the second one.
+    names = set(names)
+    if names:
+        _set_versions(names)
+        transaction.on_commit(lambda: _set_versions(names))
+
+
+def bump_rebuilt():
+    bump_versions((REBUILD_VERSION,))
+
+
+def _delete_keys(keys):
+    get_cache().delete_many(keys)
+
+
+def forget_keys(keys):
+    keys = list(keys)
+    if keys:
+        _delete_keys(keys)
+        transaction.on_commit(lambda: _delete_keys(keys))
+
+
+def cached_lookup(key, lookup):
+    # Misses are cached too (as None), signals drop the key on changes.
+    cache = get_cache()
+    missing = object()
+    value = cache.get(key, missing)
+    count_cache(hits=int(value is not missing), misses=int(value is missing))
+    if value is missing:
+        value = lookup()
+        cache.set(
+            key, value, cache_timeout(settings.BLOG_LOOKUP_CACHE_TIMEOUT)
+        )
+    return value
+
+
+def get_published_category(slug):
+    return cached_lookup(
+        CATEGORY_KEY.format(slug),
+        lambda: Category.objects.filter(slug=slug, is_published=True).first()
+    )
+
+
+def get_user_by_username(username):
+    # Only what profile pages show is cached, never the password hash or
+    # the email; the user comes back with the other fields deferred.
+    fields = cached_lookup(
+        USER_KEY.format(username),
+        lambda: User.objects.filter(username=username).values(
+            *PROFILE_FIELDS
+        ).first()
+    )
+    if fields is None:
+        return None
+    return User.from_db(
+        router.db_for_read(User), list(fields), list(fields.values())
+    )
+
+
+def post_version_names(posts):
+    names = set()
+    for pk, slug, username in posts.values_list(
+            'pk', 'category__slug', 'author__username'):
+        names.add('feed')
+        names.add(f'post:{pk}')
+        names.add(f'author:{username}')
+        if slug:
+            names.add(f'category:{slug}')
+    return names
+
+
+def related_version_name(model, pk):
+    return f'{model._meta.model_name}_id:{pk}'
+
+
+def card_version_names(post):
+    names = [
+        REBUILD_VERSION,
+        f'post:{post.id}',
+        related_version_name(Category, post.category_id),
+        related_version_name(User, post.author_id),
+    ]
+    if post.location_id is not None:
+        names.append(related_version_name(Location, post.location_id))
+    return names
+
+
+def page_validators(request, version_names):
+    # ETag and Last-Modified of a page, derived from the version stamps
+    # of what it shows and the feed time bucket, without rendering it.
+    # Publication events bump the versions when a scheduled post goes
+    # live, so with them the bucket is left out and pages stay valid
+    # until the next change. Only signed-in users get forms, hence a CSRF
+    # token in the page.
+    versions = get_versions(*version_names)
+    bucket = 0 if publication_events() else settings.BLOG_FEED_NOW_BUCKET
+    boundary = feed_now().timestamp() if bucket else 0
+    raw = '|'.join(map(str, (
+        request.path,
+        *(request.GET.get(name) for name in PAGE_PARAMS),
+        boundary, request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+        if request.user.is_authenticated else None,
+        *versions
+    )))
+    last_modified = max(
+        boundary,
+        *(version / 1e9 for version in versions)
+    )
+    return hashlib.md5(raw.encode()).hexdigest(), int(last_modified)
+
+
+def count_page_cache(outcome):
+    count_cache(hits=int(outcome == 'hit'), misses=int(outcome == 'miss'))
+    cache = get_cache()
+    key = STATS_KEY.format(outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def page_cache_stats():
+    cache = get_cache()
+    return {
+        outcome: cache.get(STATS_KEY.format(outcome), 0)
+        for outcome in ('hit', 'miss')
+    }
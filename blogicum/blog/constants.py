@@ -1,3 +1,6 @@
 LENGTH_TITLE = 256
 CHARACTER_LIMIT = 26
 PAGINATE_COUNT = 10
+COMMENTS_PAGINATE_COUNT = 20
+SEARCH_QUERY_LENGTH = 200
+THUMBNAIL_WIDTHS = (320, 640, 960, 1280)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from .models import Category, FeedEntry, Location, Post
+
+User = get_user_model()
+
+# Posts and the columns of their cards, for the posts matching a
+# condition on blog_post (aliased "post").
+SELECT_ENTRIES = (
+    'SELECT post.id, post.pub_date, post.title, post.text, post.image, '
+    'post.image_meta, post.comment_count, post.author_id, author.username, '
+    'post.category_id, category.slug, category.title, post.location_id, '
+    "CASE WHEN location.is_published THEN location.name ELSE '' END "
+    'FROM {post} post '
+    'INNER JOIN {user} author ON author.id = post.author_id '
+    'INNER JOIN {category} category ON category.id = post.category_id '
+    'LEFT OUTER JOIN {location} location ON location.id = post.location_id '
+    'WHERE post.is_published AND category.is_published{condition}'
+)
+ENTRY_COLUMNS = (
+    'id', 'pub_date', 'title', 'text', 'image', 'image_meta',
+    'comment_count', 'author_id', 'author_username', 'category_id',
+    'category_slug', 'category_title', 'location_id', 'location_name',
+)
+
+
+def _insert_entries(cursor, condition='', params=()):
+    cursor.execute(
+        f'INSERT INTO {FeedEntry._meta.db_table} '
+        f'({", ".join(ENTRY_COLUMNS)}) '
+        + SELECT_ENTRIES.format(
+            post=Post._meta.db_table,
+            user=User._meta.db_table,
+            category=Category._meta.db_table,
+            location=Location._meta.db_table,
+            condition=condition,
+        ),
+        params
+    )
+
+
+def refresh_feed(column, values, using=connection):
+    # Replaces the entries of the posts whose column (id, author_id,
+    # category_id or location_id, named alike in both tables) is in
+    # values with what blog_post holds now.
+    values = list(values)
+    if not values:
+        return
+    placeholders = ', '.join(['%s'] * len(values))
+    with using.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FeedEntry._meta.db_table} '
+            f'WHERE {column} IN ({placeholders})',
+            values
+        )
+        _insert_entries(
+            cursor, f' AND post.{column} IN ({placeholders})', values
+        )
+
+
+def rebuild_feed(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FeedEntry._meta.db_table}')
+        _insert_entries(cursor)
+    return FeedEntry.objects.using(using.alias).count()
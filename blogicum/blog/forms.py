@@ -1,6 +1,9 @@
 from django import forms
+from django.contrib.auth.forms import PasswordResetForm
 
+from .mail import send_password_reset
 from .models import Post, Comment, User
+from .queue import enqueue
 
 
 class PostForm(forms.ModelForm):
@@ -23,3 +26,24 @@ class ProfileEditForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    # Leaves rendering and delivery to the worker, which makes the reset
+    # link itself; the task stores only the recipient and the user id.
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        enqueue(
+            send_password_reset,
+            user_id=context['user'].pk,
+            to_email=to_email,
+            from_email=from_email,
+            context={
+                name: context[name]
+                for name in ('domain', 'site_name', 'protocol')
+            },
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            html_email_template_name=html_email_template_name,
+        )
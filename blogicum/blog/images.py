@@ -0,0 +1,149 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from PIL import Image, features
+
+from .cache import bump_versions, post_version_names
+from .constants import THUMBNAIL_WIDTHS
+from .feed import refresh_feed
+from .models import Post
+from .queue import enqueue, task
+
+# Derivatives live in the default storage under their own names, the
+# originals may be in any storage.
+THUMBNAIL_DIR = 'thumbnails'
+THUMBNAIL_QUALITY = 85
+# (Pillow format, extension, MIME type, quality), smallest files first.
+# AVIF needs a Pillow built with it.
+MODERN_FORMATS = tuple(
+    image_format for image_format, supported in (
+        (('AVIF', 'avif', 'image/avif', 60),
+         '.avif' in Image.registered_extensions()),
+        (('WEBP', 'webp', 'image/webp', 80), features.check('webp')),
+    ) if supported
+)
+
+
+def thumbnail_name(name, width, extension=None):
+    name = f'{THUMBNAIL_DIR}/{width}/{name}'
+    return f'{name}.{extension}' if extension else name
+
+
+def read_metadata(file):
+    # Streams the file once for the hash and size and reads only the
+    # header for the dimensions. The result is stored as Post.image_meta.
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    width, height = get_image_dimensions(file)
+    return {
+        'width': width,
+        'height': height,
+        'size': size,
+        'hash': digest.hexdigest(),
+    }
+
+
+def process_stored_image(name, storage=default_storage):
+    # Metadata and derivatives of an already stored image.
+    with storage.open(name) as file:
+        metadata = read_metadata(file)
+    make_derivatives(name, storage)
+    metadata['derivatives'] = True
+    return metadata
+
+
+def _save_derivative(image, width, target, image_format, quality):
+    if default_storage.exists(target):
+        return
+    copy = image.copy()
+    if width < image.width:
+        copy.thumbnail((width, image.height))
+    if image_format != image.format and copy.mode not in ('RGB', 'RGBA'):
+        copy = copy.convert('RGBA' if 'A' in copy.getbands() else 'RGB')
+    buffer = BytesIO()
+    copy.save(buffer, image_format, quality=quality)
+    default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def make_derivatives(name, storage=default_storage):
+    # A resized copy in the original format for each width narrower than
+    # the image, and in every modern format at those widths and at full
+    # size.
+    with storage.open(name) as file, Image.open(file) as image:
+        image.load()
+    widths = [width for width in THUMBNAIL_WIDTHS if width < image.width]
+    for width in widths:
+        _save_derivative(image, width, thumbnail_name(name, width),
+                         image.format, THUMBNAIL_QUALITY)
+    for image_format, extension, _, quality in MODERN_FORMATS:
+        for width in (*widths, image.width):
+            _save_derivative(image, width,
+                             thumbnail_name(name, width, extension),
+                             image_format, quality)
+
+
+def delete_derivatives(name):
+    # Full-size copies are filed under the image's own width.
+    try:
+        widths, _ = default_storage.listdir(THUMBNAIL_DIR)
+    except FileNotFoundError:
+        return
+    for width in widths:
+        default_storage.delete(thumbnail_name(name, width))
+        for _, extension, _, _ in MODERN_FORMATS:
+            default_storage.delete(thumbnail_name(name, width, extension))
+
+
+@task('blog.image_derivatives')
+def encode_derivatives(name):
+    meta = process_stored_image(name, Post.image.field.storage)
+    posts = Post.objects.filter(image=name)
+    posts.update(image_meta=meta)
+    refresh_feed('id', posts.values_list('pk', flat=True))
+    bump_versions(post_version_names(posts))
+
+
+def schedule_derivatives(name):
+    # Encoding is left to the task worker so uploads return without
+    # waiting for it; the posts using the image are marked and
+    # re-rendered once the derivatives are ready.
+    enqueue(encode_derivatives, key=f'image_derivatives:{name}', name=name)
+
+
+def image_sources(field, meta):
+    # Returns the <source> entries as (MIME type, ((url, width), ...)),
+    # the fallback ((url, width), ...) in the original format and the
+    # original (width, height), all from the stored metadata without
+    # touching files or the database. Until the derivatives are ready
+    # only the original is offered; posts stored before they existed are
+    # left to backfill_image_meta.
+    width, height = meta.get('width'), meta.get('height')
+    if not meta.get('derivatives'):
+        return (), ((field.url, width),), (width, height)
+    widths = [
+        thumbnail_width for thumbnail_width in THUMBNAIL_WIDTHS
+        if thumbnail_width < width
+    ]
+    sources = tuple(
+        (mime_type, tuple(
+            (default_storage.url(
+                thumbnail_name(field.name, source_width, extension)
+            ), source_width)
+            for source_width in (*widths, width)
+        ))
+        for _, extension, mime_type, _ in MODERN_FORMATS
+    )
+    fallback = tuple(
+        (default_storage.url(thumbnail_name(field.name, fallback_width)),
+         fallback_width)
+        for fallback_width in widths
+    ) + ((field.url, width),)
+    return sources, fallback, (width, height)
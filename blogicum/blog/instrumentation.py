@@ -0,0 +1,90 @@
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+_current = ContextVar('blog_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self, sampled=True):
+        # Cache and request counts are always kept; queries, view and
+        # template times only for sampled requests.
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.durations = Counter()
+        self.counts = Counter()
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+
+    def as_dict(self):
+        data = {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2)
+        }
+        for name, seconds in self.durations.items():
+            data[f'{name}_ms'] = round(seconds * 1000, 2)
+        for name, count in self.counts.items():
+            data[f'{name}_count'] = count
+        return data
+
+
+def sample():
+    return random.random() < settings.BLOG_TIMING_SAMPLE_RATE
+
+
+def current_stats():
+    # The stats of a sampled request, for the timing hooks.
+    stats = _current.get()
+    return stats if stats is not None and stats.sampled else None
+
+
+def count(name, value=1):
+    stats = _current.get()
+    if stats is not None:
+        stats.counts[name] += value
+
+
+def count_cache(hits, misses):
+    count('cache_hit', hits)
+    count('cache_miss', misses)
+
+
+def _time_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current.get()
+        stats.add('db', time.perf_counter() - start)
+        stats.counts['db'] += 1
+
+
+@contextmanager
+def track_queries():
+    # Connections are per thread: a request that runs its queries in
+    # another thread (see blog.async_views) tracks them there as well.
+    with ExitStack() as stack:
+        if current_stats() is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+        yield
+
+
+@contextmanager
+def collect_stats(sampled=True):
+    # Nested calls share the stats, and sampling, of the outermost one.
+    if _current.get() is not None:
+        yield _current.get()
+        return
+    stats = RequestStats(sampled)
+    token = _current.set(stats)
+    try:
+        with track_queries():
+            yield stats
+    finally:
+        _current.reset(token)
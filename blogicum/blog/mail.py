@@ -0,0 +1,66 @@
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import User
+from .queue import enqueue, task
+
+
+@task('blog.send_email', max_attempts=5)
+def send_email(subject, body, from_email, to, cc=(), bcc=(), reply_to=(),
+               headers=None, alternatives=()):
+    # Delivers through EMAIL_BACKEND.
+    message = EmailMultiAlternatives(
+        subject, body, from_email, to, bcc=bcc, cc=cc, reply_to=reply_to,
+        headers=headers, alternatives=[tuple(item) for item in alternatives]
+    )
+    message.send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    # Hands messages over to the task worker instead of sending them in
+    # the request. Attachments are not serialized, such messages are sent
+    # right away.
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.attachments:
+                get_connection().send_messages([message])
+                continue
+            enqueue(
+                send_email,
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.to,
+                cc=message.cc,
+                bcc=message.bcc,
+                reply_to=message.reply_to,
+                headers=message.extra_headers,
+                alternatives=getattr(message, 'alternatives', []),
+            )
+        return len(email_messages)
+
+
+@task('blog.send_password_reset', max_attempts=5)
+def send_password_reset(user_id, to_email, from_email, context,
+                        subject_template_name, email_template_name,
+                        html_email_template_name=None):
+    # The link is made here: the uid and token, which give access to the
+    # account, are never stored in the task.
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or user.email.casefold() != to_email.casefold():
+        return
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name,
+        {
+            **context,
+            'email': to_email,
+            'user': user,
+            'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        },
+        from_email, to_email, html_email_template_name
+    )
@@ -0,0 +1,74 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from PIL import UnidentifiedImageError
+
+from blog.cache import bump_versions, post_version_names
+from blog.feed import refresh_feed
+from blog.images import process_stored_image
+from blog.models import Post
+
+UPDATE_BATCH_SIZE = 500
+
+
+def process(name):
+    try:
+        return name, process_stored_image(name, default_storage), None
+    except (OSError, UnidentifiedImageError) as error:
+        return name, None, str(error)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, объём и хеш изображений публикаций и '
+            'создаёт их уменьшенные копии и копии в WebP/AVIF, '
+            'распределяя файлы по ядрам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов, по умолчанию по ядрам.')
+        parser.add_argument('--all', action='store_true',
+                            help='Обработать и уже заполненные публикации.')
+
+    def update(self, posts):
+        # Cached cards and pages render the image from image_meta.
+        Post.objects.bulk_update(posts, ['image_meta'])
+        ids = [post.pk for post in posts]
+        refresh_feed('id', ids)
+        bump_versions(post_version_names(Post.objects.filter(pk__in=ids)))
+        return len(posts)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.exclude(image_meta__has_key='derivatives')
+        # Generated and re-uploaded posts share files: read each once.
+        post_ids = defaultdict(list)
+        for pk, name in posts.values_list('pk', 'image').iterator():
+            post_ids[name].append(pk)
+        # Forked workers must not share the parent's DB connections.
+        connections.close_all()
+        updated = failed = 0
+        batch = []
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(process, name) for name in post_ids]
+            for future in as_completed(futures):
+                name, meta, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                batch.extend(
+                    Post(pk=pk, image_meta=meta) for pk in post_ids[name]
+                )
+                if len(batch) >= UPDATE_BATCH_SIZE:
+                    updated += self.update(batch)
+                    batch = []
+        if batch:
+            updated += self.update(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено публикаций: {updated}, файлов с ошибками: {failed}'
+        ))
@@ -0,0 +1,198 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog import urls as blog_urls
+from blog.cache import get_cache
+from blog.models import Post
+from blog.utils import filter_posts
+from pages import urls as pages_urls
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True, text=True,
+            cwd=settings.BASE_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время ответа, число запросов к БД и память для всех '
+            'адресов blog.urls и pages.urls и пишет результаты в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+            help='Количества публикаций, на которых проводятся замеры.'
+        )
+        parser.add_argument(
+            '--generate', action='store_true',
+            help=('Догенерировать данные до каждого размера командой '
+                  'generate_data. Запускайте только на отдельной базе.')
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--host', default='localhost',
+                            help='Значение заголовка Host для запросов.')
+        parser.add_argument('--output', default='-',
+                            help='Файл для JSON, по умолчанию stdout.')
+        parser.add_argument(
+            '--compare', metavar='JSON',
+            help='Сравнить результаты с отчётом другого коммита.'
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        for size in sorted(options['sizes']):
+            self.fill_to(size, options['generate'])
+            results.extend(
+                self.measure(size, options['repeat'], options['host'])
+            )
+        report = json.dumps({
+            'revision': git_revision(),
+            'created': time.time(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        if options['compare']:
+            self.compare(results, options['compare'])
+
+    def compare(self, results, path):
+        def key(result):
+            return (result['size'], result['url_name'], result['client'],
+                    result['cache'])
+
+        with open(path, encoding='utf-8') as file:
+            baseline = {
+                key(result): result for result in json.load(file)['results']
+            }
+        for result in results:
+            old = baseline.get(key(result))
+            if old is None:
+                continue
+            self.stderr.write(
+                '{} {} {} {}: '.format(*key(result))
+                + f'{old["median_ms"]:.1f} -> {result["median_ms"]:.1f} мс '
+                f'({result["median_ms"] / old["median_ms"]:.2f}x), '
+                f'запросов {old["queries"]} -> {result["queries"]}'
+            )
+
+    def fill_to(self, size, generate):
+        missing = size - Post.objects.count()
+        if missing <= 0:
+            return
+        if not generate:
+            raise CommandError(
+                f'В базе меньше {size} публикаций. Запустите команду с '
+                '--generate на отдельной базе данных.'
+            )
+        self.stderr.write(f'Генерация {missing} публикаций...')
+        call_command(
+            'generate_data', posts=missing, comments=missing * 5,
+            users=max(1, missing // 100), categories=max(1, missing // 1000),
+            locations=max(1, missing // 500), images=0,
+            stdout=self.stderr
+        )
+
+    def sample_kwargs(self):
+        post = (
+            filter_posts().filter(comment_count__gt=0).first()
+            or filter_posts().first()
+        )
+        if post is None:
+            raise CommandError('Нет ни одной опубликованной публикации.')
+        comment = post.comments.first()
+        return post.author, {
+            'post_id': post.id,
+            'category_slug': post.category.slug,
+            'username': post.author.username,
+            'comment_id': comment.id if comment else 0,
+        }
+
+    def urls(self, sample):
+        for module in (blog_urls, pages_urls):
+            for pattern in module.urlpatterns:
+                params = pattern.pattern.converters.keys()
+                yield f'{module.app_name}:{pattern.name}', reverse(
+                    f'{module.app_name}:{pattern.name}',
+                    kwargs={name: sample[name] for name in params}
+                )
+
+    def measure(self, size, repeat, host):
+        author, sample = self.sample_kwargs()
+        author_client = Client(HTTP_HOST=host)
+        author_client.force_login(author)
+        clients = {
+            'anonymous': Client(HTTP_HOST=host),
+            'author': author_client,
+        }
+        for name, url in self.urls(sample):
+            for client_name, client in clients.items():
+                for cache_state in ('cold', 'warm'):
+                    result = self.measure_url(
+                        client, url, repeat, cold=cache_state == 'cold'
+                    )
+                    result.update(
+                        size=size, url_name=name, path=url,
+                        client=client_name, cache=cache_state
+                    )
+                    self.stderr.write(
+                        f'{size} {name} {client_name} {cache_state}: '
+                        f'{result["median_ms"]:.1f} мс, '
+                        f'{result["queries"]} запросов'
+                    )
+                    yield result
+
+    def measure_url(self, client, url, repeat, cold):
+        timings = []
+        client.get(url)
+        for _ in range(repeat):
+            if cold:
+                get_cache().clear()
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        if cold:
+            get_cache().clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'status': response.status_code,
+            'median_ms': statistics.median(timings),
+            'p95_ms': percentile(timings, 0.95),
+            'max_ms': max(timings),
+            'queries': len(queries),
+            'peak_memory_kb': peak / 1024,
+            'response_bytes': len(response.content),
+        }
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from queue import Empty, SimpleQueue
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from blog import urls as blog_urls
+from .benchmark import Command as BenchmarkCommand, git_revision, percentile
+
+PAGES = ('index', 'post_detail', 'category_posts', 'profile')
+MODES = ('wsgi', 'asgi-sync', 'asgi')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность лент и страниц публикаций '
+            'через WSGI, через ASGI с синхронными представлениями и через '
+            'ASGI с асинхронными при множестве одновременных медленных '
+            'клиентов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50,
+                            help='Число одновременных клиентов.')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Число запросов в каждом режиме.')
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=8,
+            help='Потоков WSGI-сервера, обслуживающих клиентов.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=50,
+            help=('Сколько миллисекунд медленный клиент получает ответ. '
+                  'Под WSGI всё это время занят поток сервера.')
+        )
+        parser.add_argument(
+            '--db-latency', type=float, default=2,
+            help='Задержка в миллисекундах, добавляемая к каждому запросу '
+                 'к БД, как у базы на другой машине.'
+        )
+        parser.add_argument('--anonymous', action='store_true',
+                            help=('Анонимные клиенты: страницы отдаются '
+                                  'из кеша.'))
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=MODES)
+        parser.add_argument('--output', default='-',
+                            help='Файл для JSON, по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        author, sample = BenchmarkCommand().sample_kwargs()
+        patterns = {
+            pattern.name: pattern.pattern for pattern in blog_urls.urlpatterns
+        }
+        urls = [
+            reverse(f'blog:{name}', kwargs={
+                key: sample[key] for key in patterns[name].converters
+            })
+            for name in PAGES
+        ]
+        delay = options['db_latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        results = []
+        connection_created.connect(add_latency)
+        # The test clients send "testserver" as the host; timing logs
+        # would outweigh the requests themselves.
+        hosts = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            BLOG_TIMING_SAMPLE_RATE=0,
+        )
+        try:
+            with hosts:
+                if delay:
+                    add_latency(None, connection)
+                for mode in options['modes']:
+                    result = self.measure(
+                        mode, urls, None if options['anonymous'] else author,
+                        options
+                    )
+                    self.stderr.write(
+                        f'{mode}: {result["requests_per_second"]:.1f} '
+                        f'запросов/с, медиана {result["median_ms"]:.1f} мс, '
+                        f'p95 {result["p95_ms"]:.1f} мс, '
+                        f'ошибок {result["errors"]}'
+                    )
+                    results.append(result)
+        finally:
+            connection_created.disconnect(add_latency)
+            if slow_query in connection.execute_wrappers:
+                connection.execute_wrappers.remove(slow_query)
+        report = json.dumps({
+            'revision': git_revision(),
+            'created': time.time(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {
+                name: options[name] for name in (
+                    'clients', 'requests', 'wsgi_threads', 'client_delay',
+                    'db_latency', 'anonymous',
+                )
+            },
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+
+    def make_clients(self, client_class, author, count):
+        clients = []
+        for _ in range(count):
+            client = client_class()
+            if author is not None:
+                client.force_login(author)
+            clients.append(client)
+        return clients
+
+    def measure(self, mode, urls, author, options):
+        count = max(options['clients'], 1)
+        paths = cycle(urls)
+        jobs = [next(paths) for _ in range(options['requests'])]
+        client_delay = options['client_delay'] / 1000
+        if mode == 'wsgi':
+            clients = self.make_clients(Client, author, count)
+            started = time.perf_counter()
+            timings, errors = self.run_wsgi(
+                clients, jobs, options['wsgi_threads'], client_delay
+            )
+        else:
+            clients = self.make_clients(AsyncClient, author, count)
+            asgi_urlconf = (
+                settings.BLOG_ASGI_URLCONF if mode == 'asgi' else None
+            )
+            with override_settings(BLOG_ASGI_URLCONF=asgi_urlconf):
+                started = time.perf_counter()
+                timings, errors = asyncio.run(
+                    self.run_asgi(clients, jobs, client_delay)
+                )
+        elapsed = time.perf_counter() - started
+        return {
+            'mode': mode,
+            'requests_per_second': len(jobs) / elapsed,
+            'median_ms': statistics.median(timings),
+            'p95_ms': percentile(timings, 0.95),
+            'max_ms': max(timings),
+            'errors': errors,
+        }
+
+    def run_wsgi(self, clients, jobs, threads, client_delay):
+        # A request waits for a free server thread, which stays busy until
+        # the slow client has received the response.
+        queue = SimpleQueue()
+        for path in jobs:
+            queue.put(path)
+        timings = []
+        errors = 0
+
+        def serve(client, path):
+            response = client.get(path)
+            time.sleep(client_delay)
+            return response
+
+        def client_loop(client):
+            nonlocal errors
+            while True:
+                try:
+                    path = queue.get_nowait()
+                except Empty:
+                    return
+                start = time.perf_counter()
+                response = server.submit(serve, client, path).result()
+                timings.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+
+        with ThreadPoolExecutor(threads) as server, \
+                ThreadPoolExecutor(len(clients)) as pool:
+            list(pool.map(client_loop, clients))
+        return timings, errors
+
+    async def run_asgi(self, clients, jobs, client_delay):
+        # A slow client holds only its connection: the event loop serves
+        # the others meanwhile.
+        queue = asyncio.Queue()
+        for path in jobs:
+            queue.put_nowait(path)
+        timings = []
+        errors = 0
+
+        async def client_loop(client):
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(path)
+                await asyncio.sleep(client_delay)
+                timings.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+
+        await asyncio.gather(*(client_loop(client) for client in clients))
+        return timings, errors
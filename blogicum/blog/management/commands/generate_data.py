@@ -0,0 +1,193 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from blog.cache import get_cache
+from blog.constants import LENGTH_TITLE
+from blog.images import process_stored_image
+from blog.models import Category, Comment, Location, Post, User
+from blog.search import index_posts
+
+TEXT_POOL_SIZE = 1000
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, категориями, '
+            'местами, публикациями, комментариями и изображениями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--images', type=int, default=20,
+                            help='Сколько разных файлов изображений создать.')
+        parser.add_argument('--image-share', type=float, default=0.3,
+                            help='Доля публикаций с изображением.')
+        parser.add_argument('--days', type=int, default=365 * 3,
+                            help='За сколько дней распределить публикации.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        faker = Faker('ru_RU')
+        faker.seed_instance(options['seed'])
+        self.words = [faker.word() for _ in range(TEXT_POOL_SIZE)]
+        self.sentences = [faker.sentence() for _ in range(TEXT_POOL_SIZE)]
+
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            categories = self.create_categories(options['categories'])
+            locations = self.create_locations(options['locations'])
+            images = self.create_images(options['images'])
+            posts = self.create_posts(
+                options['posts'], users, categories, locations, images,
+                options['image_share'], options['days']
+            )
+            self.create_comments(options['comments'], users, posts)
+        # Also refills the feed table, which bulk_create bypasses.
+        call_command('rebuild_comment_count', stdout=self.stdout)
+        # bulk_create sends no post_save for the scheduled posts.
+        call_command('schedule_publications', stdout=self.stdout)
+        get_cache().clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, категорий '
+            f'{len(categories)}, мест {len(locations)}, публикаций '
+            f'{len(posts)}, комментариев {options["comments"]}, '
+            f'изображений {len(images)}.'
+        ))
+
+    def text(self, sentences):
+        return ' '.join(self.random.choices(self.sentences, k=sentences))
+
+    def bulk_create(self, model, objects):
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def create_users(self, count):
+        start = next_id(User)
+        password = make_password('benchmark')
+        ids = range(start, start + count)
+        self.bulk_create(User, (
+            User(id=pk, username=f'user_{pk}', password=password,
+                 first_name=self.random.choice(self.words).title())
+            for pk in ids
+        ))
+        return list(ids)
+
+    def create_categories(self, count):
+        start = next_id(Category)
+        ids = range(start, start + count)
+        self.bulk_create(Category, (
+            Category(
+                id=pk,
+                title=self.random.choice(self.words).title(),
+                description=self.text(2),
+                slug=f'category-{pk}',
+                is_published=self.random.random() > 0.1,
+            )
+            for pk in ids
+        ))
+        return list(ids)
+
+    def create_locations(self, count):
+        start = next_id(Location)
+        ids = range(start, start + count)
+        self.bulk_create(Location, (
+            Location(
+                id=pk,
+                name=self.random.choice(self.words).title(),
+                is_published=self.random.random() > 0.1,
+            )
+            for pk in ids
+        ))
+        return list(ids)
+
+    def create_images(self, count):
+        images = []
+        for index in range(count):
+            width = self.random.choice((640, 1280, 1920, 2560))
+            height = width * self.random.choice((9, 10, 12)) // 16
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (width, height), color).save(
+                buffer, 'JPEG', quality=90
+            )
+            name = default_storage.save(
+                f'{Post.image.field.upload_to}/generated_{index}.jpg',
+                ContentFile(buffer.getvalue())
+            )
+            images.append(
+                {'image': name, 'image_meta': process_stored_image(name)}
+            )
+        return images
+
+    def create_posts(self, count, users, categories, locations, images,
+                     image_share, days):
+        start = next_id(Post)
+        now = timezone.now()
+        ids = range(start, start + count)
+        self.bulk_create(Post, (
+            Post(
+                id=pk,
+                title=self.text(1)[:LENGTH_TITLE],
+                text=self.text(self.random.randint(3, 30)),
+                pub_date=now - timedelta(
+                    seconds=self.random.randint(-days * 864, days * 86400)
+                ),
+                author_id=self.random.choice(users),
+                category_id=self.random.choice(categories),
+                location_id=(
+                    self.random.choice(locations)
+                    if locations and self.random.random() > 0.2 else None
+                ),
+                **(
+                    self.random.choice(images)
+                    if images and self.random.random() < image_share else {}
+                ),
+                is_published=self.random.random() > 0.05,
+            )
+            for pk in ids
+        ))
+        # bulk_create sends no signals, so index the new posts here.
+        index_posts(
+            Post.objects.filter(id__gte=start).order_by('id')
+            .values_list('id', 'title', 'text').iterator()
+        )
+        return list(ids)
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        self.bulk_create(Comment, (
+            Comment(
+                text=self.text(self.random.randint(1, 4)),
+                post_id=self.random.choice(posts),
+                author_id=self.random.choice(users),
+            )
+            for _ in range(count)
+        ))
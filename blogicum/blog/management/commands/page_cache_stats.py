@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики попаданий и промахов кэша страниц.'
+
+    def handle(self, *args, **options):
+        stats = page_cache_stats()
+        total = stats['hit'] + stats['miss']
+        ratio = stats['hit'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hit"]}\n'
+            f'Промахов: {stats["miss"]}\n'
+            f'Доля попаданий: {ratio:.1%}'
+        )
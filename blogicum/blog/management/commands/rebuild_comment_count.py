@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.cache import bump_rebuilt
+from blog.feed import rebuild_feed
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев публикаций.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Post.objects.update(comment_count=Coalesce(Subquery(
+                Comment.objects.filter(post=OuterRef('pk'))
+                .order_by().values('post').annotate(count=Count('pk'))
+                .values('count')
+            ), 0))
+            rebuild_feed()
+            bump_rebuilt()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}')
+        )
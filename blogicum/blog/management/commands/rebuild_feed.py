@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import bump_rebuilt
+from blog.feed import rebuild_feed
+
+
+class Command(BaseCommand):
+    help = 'Заново заполняет таблицу ленты опубликованными публикациями.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            entries = rebuild_feed()
+            bump_rebuilt()
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в ленте: {entries}')
+        )
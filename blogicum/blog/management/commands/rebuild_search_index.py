@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import bump_rebuilt
+from blog.models import Post
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс публикаций.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild_index(Post)
+            bump_rebuilt()
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано публикаций: {indexed}')
+        )
@@ -0,0 +1,80 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.queue import claim_many, purge_finished, run_task, run_task_by_id
+from blog.signals import sweep_uploads
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди в базе данных: в этом '
+            'процессе или в пуле потоков или процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Число задач, выполняемых одновременно.')
+        parser.add_argument('--pool', choices=('thread', 'process'),
+                            default='thread',
+                            help='Пул при --concurrency больше 1.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Пауза в секундах, когда очередь пуста.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и завершиться.')
+
+    def housekeeping(self):
+        # Runs while the queue is empty.
+        now = time.monotonic()
+        if self.housekept is None or (
+                now - self.housekept > settings.BLOG_HOUSEKEEPING_INTERVAL):
+            purge_finished()
+            sweep_uploads()
+            self.housekept = now
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        pool = None
+        if concurrency > 1 and options['pool'] == 'process':
+            # Spawned, not forked: children open their own connections.
+            pool = ProcessPoolExecutor(
+                concurrency, mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        elif concurrency > 1:
+            pool = ThreadPoolExecutor(concurrency)
+        results = {}
+        self.housekept = None
+        try:
+            while True:
+                tasks = claim_many(concurrency)
+                if not tasks:
+                    self.housekeeping()
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
+                    continue
+                if pool is None:
+                    done = [run_task(claimed) for claimed in tasks]
+                else:
+                    done = list(pool.map(
+                        run_task_by_id, [claimed.pk for claimed in tasks]
+                    ))
+                for result in done:
+                    results[result] = results.get(result, 0) + 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            'Задач выполнено: {}, отложено для повтора: {}, '
+            'с ошибкой: {}'.format(
+                results.get('done', 0), results.get('retry', 0),
+                results.get('failed', 0)
+            )
+        ))
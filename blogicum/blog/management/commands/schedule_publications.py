@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.publication import schedule_pending_publications
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь события публикации для отложенных '
+            'публикаций, сохранённых без них.')
+
+    def handle(self, *args, **options):
+        scheduled = schedule_pending_publications()
+        self.stdout.write(self.style.SUCCESS(
+            f'Запланировано моментов публикации: {scheduled}'
+        ))
@@ -0,0 +1,237 @@
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+IMAGE_BUCKETS = tuple(2 ** power * 1024 for power in range(4, 15, 2))
+
+
+class Registry:
+    # Values live in process memory. With BLOG_METRICS_DIR set every
+    # process also dumps them to its own file there, and a scrape sums
+    # the files of all processes, dead ones included, so counters keep
+    # growing across worker restarts.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.file_name = f'{self.pid}_{uuid.uuid4().hex}.json'
+        self.flushed = 0
+        for metric in self.metrics.values():
+            metric.values.clear()
+
+    def check_fork(self):
+        # Called with the lock held; a forked worker starts from zero.
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return {
+                name: [
+                    [list(labels),
+                     list(value) if isinstance(value, list) else value]
+                    for labels, value in metric.values.items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self, force=False):
+        directory = settings.BLOG_METRICS_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and (
+                now - self.flushed < settings.BLOG_METRICS_FLUSH_INTERVAL):
+            return
+        self.flushed = now
+        path = Path(directory) / self.file_name
+        temporary = path.with_name(
+            f'{self.file_name}.{threading.get_ident()}.tmp'
+        )
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self):
+        if not settings.BLOG_METRICS_DIR:
+            return self.snapshot()
+        self.flush(force=True)
+        merged = {name: {} for name in self.metrics}
+        for path in Path(settings.BLOG_METRICS_DIR).glob('*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                if name not in merged:
+                    continue
+                for labels, value in values:
+                    merged[name][tuple(labels)] = self.metrics[name].merge(
+                        merged[name].get(tuple(labels)), value
+                    )
+        return {
+            name: [[list(labels), value] for labels, value in values.items()]
+            for name, values in merged.items()
+        }
+
+    def render(self):
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in sorted(values):
+                lines.extend(metric.lines(dict(zip(metric.labels, labels)),
+                                          value))
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"')
+        )
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def inc(self, *labels, value=1):
+        with self.registry.lock:
+            self.registry.check_fork()
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def lines(self, labels, value):
+        yield f'{self.name}{format_labels(labels)} {format_value(value)}'
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=(),
+                 registry=None):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labels, registry)
+
+    def observe(self, amount, *labels):
+        # Per-bucket counts followed by the +Inf bucket and the sum.
+        index = bisect_left(self.buckets, amount)
+        with self.registry.lock:
+            self.registry.check_fork()
+            value = self.values.setdefault(
+                labels, [0] * (len(self.buckets) + 2)
+            )
+            value[index] += 1
+            value[-1] += amount
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return list(value)
+        return [left + right for left, right in zip(total, value)]
+
+    def lines(self, labels, value):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), value):
+            cumulative += count
+            bucket_labels = {**labels, 'le': format_value(bound)}
+            yield (f'{self.name}_bucket{format_labels(bucket_labels)} '
+                   f'{cumulative}')
+        yield f'{self.name}_sum{format_labels(labels)} {value[-1]}'
+        yield f'{self.name}_count{format_labels(labels)} {cumulative}'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = Histogram(
+    'blog_request_duration_seconds', 'Время обработки запроса.',
+    labels=('view', 'method'), buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'blog_requests_total', 'Число ответов по кодам состояния.',
+    labels=('view', 'status')
+)
+QUERIES = Histogram(
+    'blog_db_queries',
+    'Число запросов к БД на один HTTP-запрос (по выборке запросов).',
+    labels=('view',), buckets=QUERY_BUCKETS
+)
+CACHE = Counter(
+    'blog_cache_requests_total',
+    'Обращения к кешу страниц, карточек и справочников.',
+    labels=('result',)
+)
+WRITES = Counter(
+    'blog_writes_total', 'Создание, изменение и удаление записей.',
+    labels=('model', 'action')
+)
+IMAGE_UPLOADS = Histogram(
+    'blog_image_upload_bytes', 'Размер загруженных изображений.',
+    buckets=IMAGE_BUCKETS
+)
+TASKS = Counter(
+    'blog_tasks_total', 'Выполнение фоновых задач по результатам.',
+    labels=('task', 'result')
+)
+
+
+def view_label(request):
+    match = request.resolver_match
+    if match is None or match.namespace not in ('blog', 'pages'):
+        return 'other'
+    return match.view_name
+
+
+def observe_request(request, response, stats, seconds):
+    view = view_label(request)
+    REQUEST_LATENCY.observe(seconds, view, request.method)
+    REQUESTS.inc(view, str(response.status_code))
+    if stats.sampled:
+        QUERIES.observe(stats.counts['db'], view)
+    for result in ('hit', 'miss'):
+        if stats.counts[f'cache_{result}']:
+            CACHE.inc(result, value=stats.counts[f'cache_{result}'])
+    REGISTRY.flush()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from .instrumentation import collect_stats, current_stats, sample
+from .metrics import observe_request
+
+logger = logging.getLogger('blog.timing')
+
+SERVER_TIMING = (
+    ('db', 'Database'),
+    ('view', 'View'),
+    ('template', 'Templates'),
+)
+
+
+class HybridMiddleware:
+    # Runs in the mode of the handler: under ASGI the request is not
+    # passed to the sync thread and back for it.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Lets the handler await the instance, as MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def handle(self, request):
+        return self.get_response(request)
+
+
+class AsgiUrlconfMiddleware(HybridMiddleware):
+    # ASGI requests are served by the async variants of the blog views.
+    async def __acall__(self, request):
+        if settings.BLOG_ASGI_URLCONF:
+            request.urlconf = settings.BLOG_ASGI_URLCONF
+        return await self.get_response(request)
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.is_async:
+            # Django adapts sync hooks with a hop to the sync thread.
+            self.process_view = self.aprocess_view
+
+    def handle(self, request):
+        with collect_stats(sample()) as stats:
+            response = self.get_response(request)
+            return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        with collect_stats(sample()) as stats:
+            response = await self.get_response(request)
+            return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        if not stats.sampled:
+            return response
+        started = getattr(request, 'blog_view_started', None)
+        if started is not None and 'view' not in stats.durations:
+            stats.add('view', time.perf_counter() - started)
+        data = stats.as_dict()
+        match = request.resolver_match
+        data.update(
+            method=request.method,
+            path=request.path,
+            view=match.view_name if match else None,
+            status=response.status_code,
+        )
+        if settings.BLOG_SERVER_TIMING_HEADER:
+            response.headers['Server-Timing'] = self.server_timing(data)
+        logger.info(json.dumps(data, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if current_stats() is not None:
+            request.blog_view_started = time.perf_counter()
+
+    async def aprocess_view(self, request, *args):
+        ServerTimingMiddleware.process_view(self, request, *args)
+
+    def process_template_response(self, request, response):
+        # Runs between the view and rendering of its TemplateResponse.
+        stats = current_stats()
+        if stats is None:
+            return response
+        started = time.perf_counter()
+        stats.add('view', started - request.blog_view_started)
+        response.add_post_render_callback(
+            lambda rendered: stats.add(
+                'template', time.perf_counter() - started
+            )
+        )
+        return response
+
+    @staticmethod
+    def server_timing(data):
+        metrics = [
+            f'{name};dur={data[f"{name}_ms"]};desc="{description}"'
+            for name, description in SERVER_TIMING
+            if f'{name}_ms' in data
+        ]
+        metrics.append(f'queries;desc="{data.get("db_count", 0)}"')
+        metrics.append('cache;desc="hit={} miss={}"'.format(
+            data.get('cache_hit_count', 0), data.get('cache_miss_count', 0)
+        ))
+        metrics.append(f'total;dur={data["total_ms"]}')
+        return ', '.join(metrics)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    def handle(self, request):
+        if not settings.BLOG_METRICS_ENABLED:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with collect_stats(sample()) as stats:
+            response = self.get_response(request)
+        observe_request(
+            request, response, stats, time.perf_counter() - started
+        )
+        return response
+
+    async def __acall__(self, request):
+        if not settings.BLOG_METRICS_ENABLED:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with collect_stats(sample()) as stats:
+            response = await self.get_response(request)
+        observe_request(
+            request, response, stats, time.perf_counter() - started
+        )
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-18 17:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_alter_post_options'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'default_related_name': 'posts', 'ordering': ['-pub_date', '-id'], 'verbose_name': 'публикация', 'verbose_name_plural': 'Публикации'},
+        ),
+    ]
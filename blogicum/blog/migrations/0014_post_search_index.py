@@ -0,0 +1,87 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+# blog.search as of this migration: later changes to it must not change
+# what the migration creates.
+WORD_RE = re.compile(r'\w+')
+LATIN_RE = re.compile(r'[a-z]')
+CHUNK_SIZE = 1000
+STEMMERS = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+SQLITE_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING '
+    "fts5(title, text, tokenize = 'unicode61 remove_diacritics 2')",
+)
+SQLITE_INSERT = (
+    'INSERT INTO blog_post_fts (rowid, title, text) VALUES (%s, %s, %s)'
+)
+SQLITE_DROP = 'DROP TABLE IF EXISTS blog_post_fts'
+
+POSTGRES_CREATE = (
+    'CREATE TABLE IF NOT EXISTS blog_post_search ('
+    'post_id bigint PRIMARY KEY REFERENCES blog_post (id) '
+    'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+    'document tsvector NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS blog_post_search_document_idx '
+    'ON blog_post_search USING GIN (document)',
+    'INSERT INTO blog_post_search (post_id, document) '
+    "SELECT id, setweight(to_tsvector('russian', coalesce(title, '')), 'A') "
+    "|| setweight(to_tsvector('russian', coalesce(text, '')), 'B') "
+    'FROM blog_post',
+)
+POSTGRES_DROP = 'DROP TABLE IF EXISTS blog_post_search'
+
+
+def stem(text):
+    return ' '.join(
+        STEMMERS['english' if LATIN_RE.match(word) else 'russian']
+        .stemWord(word)
+        for word in WORD_RE.findall((text or '').lower().replace('ё', 'е'))
+    )
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for sql in POSTGRES_CREATE:
+            schema_editor.execute(sql)
+    if connection.vendor != 'sqlite':
+        return
+    for sql in SQLITE_CREATE:
+        schema_editor.execute(sql)
+    rows = apps.get_model('blog', 'Post').objects.using(
+        connection.alias
+    ).order_by('id').values_list('id', 'title', 'text')
+    chunk = []
+    with connection.cursor() as cursor:
+        for pk, title, text in rows.iterator(chunk_size=CHUNK_SIZE):
+            chunk.append((pk, stem(title), stem(text)))
+            if len(chunk) == CHUNK_SIZE:
+                cursor.executemany(SQLITE_INSERT, chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(SQLITE_INSERT, chunk)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_comment_pagination'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Ширина, высота, размер в байтах и SHA-256 изображения.', verbose_name='Сведения об изображении'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 3.2.16 on 2026-10-18 18:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+# blog.feed as of this migration: later changes to the models or to the
+# feed must not change what it runs.
+FILL_FEED = (
+    'INSERT INTO {entry} (id, pub_date, title, text, image, image_meta, '
+    'comment_count, author_id, author_username, category_id, category_slug, '
+    'category_title, location_id, location_name) '
+    'SELECT post.id, post.pub_date, post.title, post.text, post.image, '
+    'post.image_meta, post.comment_count, post.author_id, author.username, '
+    'post.category_id, category.slug, category.title, post.location_id, '
+    "CASE WHEN location.is_published THEN location.name ELSE '' END "
+    'FROM {post} post '
+    'INNER JOIN {user} author ON author.id = post.author_id '
+    'INNER JOIN {category} category ON category.id = post.category_id '
+    'LEFT OUTER JOIN {location} location ON location.id = post.location_id '
+    'WHERE post.is_published AND category.is_published'
+)
+
+
+def fill_feed(apps, schema_editor):
+    def table(model):
+        return schema_editor.quote_name(apps.get_model(model)._meta.db_table)
+
+    schema_editor.execute(FILL_FEED.format(
+        entry=table('blog.FeedEntry'),
+        post=table('blog.Post'),
+        user=table(settings.AUTH_USER_MODEL),
+        category=table('blog.Category'),
+        location=table('blog.Location'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Публикация')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Изображение')),
+                ('image_meta', models.JSONField(default=dict, verbose_name='Сведения об изображении')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('author_id', models.BigIntegerField(verbose_name='Автор')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Имя пользователя')),
+                ('category_id', models.BigIntegerField(verbose_name='Категория')),
+                ('category_slug', models.SlugField(db_index=False, verbose_name='Идентификатор')),
+                ('category_title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('location_id', models.BigIntegerField(blank=True, null=True, verbose_name='Местоположение')),
+                ('location_name', models.CharField(blank=True, help_text='Пусто, если место снято с публикации.', max_length=256, verbose_name='Название места')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'ordering': ('-pub_date', '-id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['-pub_date', '-id'], name='feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['category_id', '-pub_date', '-id'], name='feed_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['author_id', '-pub_date', '-id'], name='feed_author_idx'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
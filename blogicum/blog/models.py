@@ -1,11 +1,29 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.query import ModelIterable
+from django.utils import timezone
 
 from blog.constants import CHARACTER_LIMIT, LENGTH_TITLE
+from blog.storage import ContentAddressedStorage
 
 User = get_user_model()
 
 
+class PostIterable(ModelIterable):
+    def __iter__(self):
+        for entry in super().__iter__():
+            yield entry.as_post()
+
+
+class FeedEntryQuerySet(models.QuerySet):
+    def as_posts(self):
+        # Yields Post instances built from the entries, with author,
+        # category and location filled in, without touching their tables.
+        clone = self._chain()
+        clone._iterable_class = PostIterable
+        return clone
+
+
 class PublishedCreatedModel(models.Model):
     is_published = models.BooleanField(
         default=True,
@@ -91,13 +109,44 @@ class Post(PublishedCreatedModel):
     image = models.ImageField(
         'Изображение',
         upload_to='posts_images',
+        storage=ContentAddressedStorage(),
         blank=True)
+    image_meta = models.JSONField(
+        'Сведения об изображении',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Ширина, высота, размер в байтах и SHA-256 изображения.'
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            # Image files are shared, see ContentAddressedStorage.
+            models.Index(fields=('image',), name='post_image_idx'),
+        )
 
     def __str__(self):
         return self.title[:CHARACTER_LIMIT]
@@ -123,8 +172,150 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ('created_at',)
+        ordering = ('created_at', 'id')
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий пользователя {self.author}'
+
+
+class Task(models.Model):
+    # A unit of background work, see blog.queue. The table is the broker:
+    # a task enqueued inside a transaction becomes visible to workers
+    # only when it commits.
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=255,
+        blank=True,
+        help_text=('Пока задача с этим ключом ждёт или выполняется, '
+                   'такая же не ставится в очередь повторно.')
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Наибольшее число попыток', default=3
+    )
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята исполнителем до', null=True, blank=True
+    )
+    error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_at', 'id')
+        indexes = (
+            models.Index(fields=('status', 'run_at'),
+                         name='task_status_run_at_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=(models.Q(status__in=('queued', 'running'))
+                           & ~models.Q(key='')),
+                name='task_pending_key_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class FeedEntry(models.Model):
+    # A published post in a published category with what its card shows,
+    # kept by blog.feed so that feeds read one table by one index. id is
+    # the post id. Posts scheduled for later are included, the feeds
+    # still compare pub_date with now.
+    id = models.BigIntegerField('Публикация', primary_key=True)
+    pub_date = models.DateTimeField('Дата и время публикации')
+    title = models.CharField('Заголовок', max_length=LENGTH_TITLE)
+    text = models.TextField('Текст')
+    image = models.CharField('Изображение', max_length=100, blank=True)
+    image_meta = models.JSONField('Сведения об изображении', default=dict)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0
+    )
+    author_id = models.BigIntegerField('Автор')
+    author_username = models.CharField('Имя пользователя', max_length=150)
+    category_id = models.BigIntegerField('Категория')
+    category_slug = models.SlugField('Идентификатор', db_index=False)
+    category_title = models.CharField('Заголовок', max_length=LENGTH_TITLE)
+    location_id = models.BigIntegerField(
+        'Местоположение', null=True, blank=True
+    )
+    location_name = models.CharField(
+        'Название места',
+        max_length=LENGTH_TITLE,
+        blank=True,
+        help_text='Пусто, если место снято с публикации.'
+    )
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'), name='feed_idx'),
+            models.Index(
+                fields=('category_id', '-pub_date', '-id'),
+                name='feed_category_idx',
+            ),
+            models.Index(
+                fields=('author_id', '-pub_date', '-id'),
+                name='feed_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.title[:CHARACTER_LIMIT]
+
+    def as_post(self):
+        post = Post(
+            id=self.id,
+            is_published=True,
+            title=self.title,
+            text=self.text,
+            pub_date=self.pub_date,
+            image=self.image,
+            image_meta=self.image_meta,
+            comment_count=self.comment_count,
+        )
+        post.author = User(id=self.author_id, username=self.author_username)
+        post.category = Category(
+            id=self.category_id,
+            slug=self.category_slug,
+            title=self.category_title,
+            is_published=True,
+        )
+        if self.location_id is not None:
+            post.location = Location(
+                id=self.location_id,
+                name=self.location_name,
+                is_published=bool(self.location_name),
+            )
+        return post
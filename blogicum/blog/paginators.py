@@ -0,0 +1,217 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+COUNT_KEY = 'blog:count:{}'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    # Pages are selected by "strictly after/before the boundary key"
+    # plus LIMIT, so a page costs the same however deep it is.
+    # The last ordering field must be unique (usually id).
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        model = object_list.model
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in (ordering or model._meta.ordering)
+        ]
+        self.fields = [
+            model._meta.get_field(name) for name, _ in self.ordering
+        ]
+
+    def encode_cursor(self, obj, direction):
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(raw)
+            if (direction not in (self.NEXT, self.PREVIOUS)
+                    or len(values) != len(self.fields)):
+                raise InvalidCursor(cursor)
+            return direction, [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, TypeError, ValueError,
+                ValidationError) as error:
+            raise InvalidCursor(cursor) from error
+
+    def _after(self, values, reverse=False):
+        condition = Q()
+        for index, ((name, descending), value) in enumerate(
+                zip(self.ordering, values)):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(
+                **{self.ordering[i][0]: values[i] for i in range(index)},
+                **{f'{name}__{lookup}': value}
+            )
+        return condition
+
+    def _order_by(self, reverse=False):
+        return [
+            f'-{name}' if descending != reverse else name
+            for name, descending in self.ordering
+        ]
+
+    def page(self, cursor=None):
+        direction, values = (
+            self.decode_cursor(cursor) if cursor else (self.NEXT, None)
+        )
+        reverse = direction == self.PREVIOUS
+        queryset = self.object_list.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if reverse:
+            objects.reverse()
+        if not objects:
+            return KeysetPage(objects, self)
+        has_next = has_more if not reverse else True
+        has_previous = values is not None if not reverse else has_more
+        return KeysetPage(
+            objects,
+            self,
+            next_cursor=(
+                self.encode_cursor(objects[-1], self.NEXT)
+                if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(objects[0], self.PREVIOUS)
+                if has_previous else None
+            ),
+        )
+
+
+class WindowedPage(Page):
+    on_each_side = 2
+    on_ends = 1
+
+    @property
+    def page_window(self):
+        return self.paginator.get_elided_page_range(
+            self.number, on_each_side=self.on_each_side, on_ends=self.on_ends
+        )
+
+
+class FeedPaginator(Paginator):
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CountlessPage(WindowedPage):
+    def __init__(self, object_list, number, paginator, next_exists):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = next_exists
+
+    def has_next(self):
+        return self.next_exists
+
+
+class CachedCountPaginator(FeedPaginator):
+    # Fetches per_page + 1 rows to learn whether a next page exists and
+    # takes the total for page links from a cache, so no request runs
+    # COUNT(*) while the cached total is fresh.
+    # count_key names the rows counted: the view builds it from what
+    # selects them and their version, not from the SQL, which carries
+    # the current time. The total may miss the posts going live within
+    # the timeout.
+
+    def __init__(self, *args, count_key, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        cache = caches[settings.BLOG_CACHE_ALIAS]
+        key = COUNT_KEY.format(
+            hashlib.md5(self.count_key.encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.BLOG_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage('На этой странице нет результатов.')
+        next_exists = len(objects) > self.per_page
+        seen = bottom + len(objects)
+        # Keep the approximate total consistent with the fetched rows.
+        if not next_exists or self.count < seen:
+            self.count = seen
+            self.__dict__.pop('num_pages', None)
+        return CountlessPage(
+            objects[:self.per_page], number, self, next_exists
+        )
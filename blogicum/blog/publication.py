@@ -0,0 +1,35 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_versions, post_version_names
+from .models import Post
+from .queue import enqueue, task
+from .utils import publication_events
+
+
+@task('blog.publish_due', max_attempts=10)
+def publish_due(at):
+    # Fired at a pub_date: the posts scheduled for that moment become
+    # visible, so the pages showing them are re-rendered.
+    bump_versions(post_version_names(
+        Post.objects.filter(pub_date=parse_datetime(at))
+    ))
+
+
+def schedule_publication(pub_date):
+    # One event per moment however many posts share it. An event left
+    # behind by an edited pub_date only re-renders a few pages.
+    if publication_events() and pub_date > timezone.now():
+        enqueue(publish_due, key=f'publish_due:{pub_date.isoformat()}',
+                run_at=pub_date, at=pub_date.isoformat())
+
+
+def schedule_pending_publications():
+    pub_dates = Post.objects.filter(
+        pub_date__gt=timezone.now()
+    ).values_list('pub_date', flat=True).distinct().order_by()
+    scheduled = 0
+    for pub_date in pub_dates.iterator():
+        schedule_publication(pub_date)
+        scheduled += 1
+    return scheduled
@@ -0,0 +1,140 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .metrics import TASKS
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=3):
+    # Registers a function that workers may run by name. Its keyword
+    # arguments must be JSON-serializable, and since a failed attempt is
+    # retried the function must be safe to run more than once.
+    def register(function):
+        function.task_name = name
+        function.max_attempts = max_attempts
+        _registry[name] = function
+        return function
+    return register
+
+
+def enqueue(function, key='', run_at=None, **kwargs):
+    # Stores the task in the current transaction. With a key, a task that
+    # is still waiting or running under that key is returned instead.
+    if key:
+        existing = Task.objects.filter(
+            key=key, status__in=(Task.QUEUED, Task.RUNNING)
+        ).first()
+        if existing is not None:
+            return existing
+    try:
+        with transaction.atomic():
+            queued = Task.objects.create(
+                name=function.task_name,
+                payload=kwargs,
+                key=key,
+                max_attempts=function.max_attempts,
+                run_at=run_at or timezone.now(),
+            )
+    except IntegrityError:
+        return Task.objects.get(
+            key=key, status__in=(Task.QUEUED, Task.RUNNING)
+        )
+    if settings.BLOG_TASKS_EAGER and run_at is None:
+        transaction.on_commit(lambda: run_task(claim(queued.pk)))
+    return queued
+
+
+def _claimable(now):
+    # Waiting tasks that are due, and running ones whose worker died.
+    return Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(pk=None, now=None):
+    # Takes one task for this worker: a conditional UPDATE that only one
+    # worker can win, which needs no row locks and works on SQLite too.
+    now = now or timezone.now()
+    tasks = _claimable(now)
+    if pk is not None:
+        tasks = tasks.filter(pk=pk)
+    for candidate in tasks.values_list('pk', 'status', 'locked_until')[:10]:
+        pk, status, locked_until = candidate
+        won = Task.objects.filter(
+            pk=pk, status=status, locked_until=locked_until
+        ).update(
+            status=Task.RUNNING,
+            locked_until=now + timedelta(seconds=settings.BLOG_TASK_LEASE),
+            attempts=F('attempts') + 1,
+        )
+        if won:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def claim_many(count):
+    tasks = []
+    while len(tasks) < count:
+        claimed = claim()
+        if claimed is None:
+            break
+        tasks.append(claimed)
+    return tasks
+
+
+def run_task(claimed):
+    if claimed is None:
+        return None
+    try:
+        _registry[claimed.name](**claimed.payload)
+    except Exception:
+        error = traceback.format_exc()
+        retry = claimed.attempts < claimed.max_attempts
+        logger.warning('Задача %s (%s) не выполнена, попытка %s',
+                       claimed.pk, claimed.name, claimed.attempts)
+        Task.objects.filter(pk=claimed.pk).update(
+            status=Task.QUEUED if retry else Task.FAILED,
+            run_at=timezone.now() + timedelta(
+                seconds=settings.BLOG_TASK_RETRY_DELAY
+                * 2 ** (claimed.attempts - 1)
+            ),
+            locked_until=None,
+            error=error,
+        )
+        result = 'retry' if retry else Task.FAILED
+    else:
+        Task.objects.filter(pk=claimed.pk).update(
+            status=Task.DONE, locked_until=None, error=''
+        )
+        result = Task.DONE
+    TASKS.inc(claimed.name, result)
+    return result
+
+
+def purge_finished(now=None):
+    # Finished tasks are kept only to be looked at in the admin for a
+    # while; failed ones stay until deleted there.
+    now = now or timezone.now()
+    return Task.objects.filter(
+        status=Task.DONE,
+        created_at__lt=now - timedelta(seconds=settings.BLOG_TASK_KEEP_DONE),
+    ).delete()[0]
+
+
+def run_task_by_id(pk):
+    # Entry point for pool workers, which hold their own connections.
+    try:
+        return run_task(Task.objects.get(pk=pk))
+    finally:
+        connection.close()
@@ -0,0 +1,200 @@
+import re
+
+import snowballstemmer
+from django.db import connection
+from django.db.models import Q
+
+WORD_RE = re.compile(r'\w+')
+LATIN_RE = re.compile(r'[a-z]')
+REINDEX_CHUNK_SIZE = 1000
+# Stems at least this long also match longer stems ("путешеств" finds
+# "путешествова"), shorter ones only match exactly.
+PREFIX_STEM_LENGTH = 4
+
+_stemmers = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+
+def stem_words(text):
+    words = WORD_RE.findall((text or '').lower().replace('ё', 'е'))
+    return [
+        _stemmers['english' if LATIN_RE.match(word) else 'russian']
+        .stemWord(word)
+        for word in words
+    ]
+
+
+class SqliteSearch:
+    # FTS5 has no Russian stemmer, so documents and queries are stemmed
+    # here and the index stores stems. rowid is the post id.
+    table = 'blog_post_fts'
+    rank = 'bm25(blog_post_fts, 10.0, 1.0)'
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING '
+            "fts5(title, text, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, cursor, posts):
+        posts = list(posts)
+        self.remove(cursor, [pk for pk, _, _ in posts])
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            [
+                (pk, ' '.join(stem_words(title)), ' '.join(stem_words(text)))
+                for pk, title, text in posts
+            ]
+        )
+
+    def remove(self, cursor, ids):
+        cursor.executemany(
+            f'DELETE FROM {self.table} WHERE rowid = %s',
+            [(pk,) for pk in ids]
+        )
+
+    def search(self, posts, query):
+        stems = stem_words(query)
+        if not stems:
+            return None
+        return posts.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = blog_post.id',
+                   f'{self.table} MATCH %s'],
+            params=[' '.join(
+                f'"{stem}"*' if len(stem) >= PREFIX_STEM_LENGTH
+                else f'"{stem}"'
+                for stem in stems
+            )],
+            select={'search_rank': self.rank},
+        )
+
+
+class PostgresSearch:
+    table = 'blog_post_search'
+    document = (
+        "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+    )
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'post_id bigint PRIMARY KEY REFERENCES blog_post (id) '
+            'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+            'document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx '
+            f'ON {self.table} USING GIN (document)'
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index(self, cursor, posts):
+        cursor.execute(
+            f'INSERT INTO {self.table} (post_id, document) '
+            f'SELECT id, {self.document} FROM blog_post WHERE id = ANY(%s) '
+            'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+            [[pk for pk, _, _ in posts]]
+        )
+
+    def remove(self, cursor, ids):
+        cursor.execute(
+            f'DELETE FROM {self.table} WHERE post_id = ANY(%s)', [list(ids)]
+        )
+
+    def search(self, posts, query):
+        if not WORD_RE.search(query):
+            return None
+        tsquery = "websearch_to_tsquery('russian', %s)"
+        return posts.extra(
+            tables=[self.table],
+            where=[f'{self.table}.post_id = blog_post.id',
+                   f'{self.table}.document @@ {tsquery}'],
+            params=[query],
+            select={'search_rank': f'-ts_rank({self.table}.document, '
+                                   f'{tsquery})'},
+            select_params=[query],
+        )
+
+
+class LikeSearch:
+    # Any other database: no index, a plain substring scan.
+    def create(self, cursor):
+        pass
+
+    def drop(self, cursor):
+        pass
+
+    def index(self, cursor, posts):
+        pass
+
+    def remove(self, cursor, ids):
+        pass
+
+    def search(self, posts, query):
+        condition = Q()
+        for word in WORD_RE.findall(query):
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        if not condition:
+            return None
+        return posts.filter(condition).extra(select={'search_rank': '0'})
+
+
+BACKENDS = {
+    'sqlite': SqliteSearch,
+    'postgresql': PostgresSearch,
+}
+
+
+def get_backend(using=connection):
+    return BACKENDS.get(using.vendor, LikeSearch)()
+
+
+def index_posts(posts, using=connection):
+    # posts: (id, title, text) rows.
+    with using.cursor() as cursor:
+        get_backend(using).index(cursor, posts)
+
+
+def remove_posts(ids, using=connection):
+    with using.cursor() as cursor:
+        get_backend(using).remove(cursor, ids)
+
+
+def rebuild_index(post_model, using=connection):
+    backend = get_backend(using)
+    with using.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+        rows = post_model.objects.using(using.alias).order_by(
+            'id'
+        ).values_list('id', 'title', 'text')
+        indexed = 0
+        chunk = []
+        for row in rows.iterator(chunk_size=REINDEX_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == REINDEX_CHUNK_SIZE:
+                backend.index(cursor, chunk)
+                indexed += len(chunk)
+                chunk = []
+        if chunk:
+            backend.index(cursor, chunk)
+            indexed += len(chunk)
+    return indexed
+
+
+def search_posts(posts, query):
+    # Best matches first, newest first among equal ranks.
+    found = get_backend().search(posts, query)
+    if found is None:
+        return posts.none()
+    return found.order_by('search_rank', *posts.model._meta.ordering)
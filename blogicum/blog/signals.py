@@ -0,0 +1,261 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .cache import (
+    CATEGORY_KEY,
+    RELATED_VERSION,
+    USER_KEY,
+    bump_versions,
+    forget_keys,
+    post_version_names,
+    related_version_name,
+)
+from .images import (
+    delete_derivatives,
+    read_metadata,
+    schedule_derivatives,
+)
+from .metrics import IMAGE_UPLOADS, WRITES
+from .feed import refresh_feed
+from .models import Category, Comment, FeedEntry, Location, Post, User
+from .publication import schedule_publication
+from .search import index_posts, remove_posts
+
+
+def change_comment_count(post_id, delta):
+    for model in (Post, FeedEntry):
+        model.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + delta
+        )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    instance._saved_post_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('post_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif instance._saved_post_id not in (None, instance.post_id):
+        change_comment_count(instance._saved_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+
+
+VERSION_NAMES = {
+    Post: lambda pk: post_version_names(Post.objects.filter(pk=pk)),
+    Comment: lambda pk: post_version_names(
+        Post.objects.filter(comments__pk=pk)
+    ),
+}
+# Rows shown next to posts. Nothing refers to a new one yet, so only
+# updates and deletions bump.
+RELATED_MODELS = (Category, Location, User)
+
+
+def is_login_update(kwargs):
+    return kwargs.get('update_fields') == frozenset(('last_login',))
+
+
+def remember_version_names(sender, instance, **kwargs):
+    if instance.pk is not None and not is_login_update(kwargs):
+        instance._version_names = VERSION_NAMES[sender](instance.pk)
+
+
+def bump_saved_version_names(sender, instance, **kwargs):
+    if not is_login_update(kwargs):
+        bump_versions(
+            getattr(instance, '_version_names', set())
+            | VERSION_NAMES[sender](instance.pk)
+        )
+
+
+def bump_deleted_version_names(sender, instance, **kwargs):
+    bump_versions(getattr(instance, '_version_names', set()))
+
+
+for model in VERSION_NAMES:
+    pre_save.connect(remember_version_names, sender=model)
+    pre_delete.connect(remember_version_names, sender=model)
+    post_save.connect(bump_saved_version_names, sender=model)
+    post_delete.connect(bump_deleted_version_names, sender=model)
+
+
+def bump_related_versions(sender, instance, created=False, **kwargs):
+    if not created and not is_login_update(kwargs):
+        bump_versions((
+            RELATED_VERSION, related_version_name(sender, instance.pk)
+        ))
+
+
+for model in RELATED_MODELS:
+    post_save.connect(bump_related_versions, sender=model)
+    post_delete.connect(bump_related_versions, sender=model)
+
+
+LOOKUP_KEYS = {
+    Category: ('slug', CATEGORY_KEY),
+    User: ('username', USER_KEY),
+}
+
+
+def remember_lookup_key(sender, instance, **kwargs):
+    field, _ = LOOKUP_KEYS[sender]
+    instance._saved_lookup_value = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(field, flat=True).first()
+        if instance.pk is not None and not is_login_update(kwargs) else None
+    )
+
+
+def forget_lookup_keys(sender, instance, **kwargs):
+    if is_login_update(kwargs):
+        return
+    field, key = LOOKUP_KEYS[sender]
+    forget_keys({
+        key.format(value) for value in (
+            getattr(instance, field),
+            getattr(instance, '_saved_lookup_value', None),
+        ) if value is not None
+    })
+
+
+for model in LOOKUP_KEYS:
+    pre_save.connect(remember_lookup_key, sender=model)
+    post_save.connect(forget_lookup_keys, sender=model)
+    post_delete.connect(forget_lookup_keys, sender=model)
+
+
+@receiver(pre_save, sender=Post)
+def process_image_upload(sender, instance, **kwargs):
+    instance._image_uploaded = bool(
+        instance.image and not instance.image._committed
+    )
+    if instance._image_uploaded:
+        instance.image_meta = read_metadata(instance.image)
+        IMAGE_UPLOADS.observe(instance.image_meta['size'])
+    elif not instance.image:
+        instance.image_meta = {}
+    instance._saved_image = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('image', flat=True).first()
+        if instance.pk and (instance._image_uploaded or not instance.image)
+        else None
+    )
+
+
+def release_image(storage, name):
+    # Image files are shared by content, remove one only after the last
+    # post using it is gone.
+    def delete_if_unused():
+        if storage.release(name, Post.objects.filter(image=name).exists):
+            delete_derivatives(name)
+
+    transaction.on_commit(delete_if_unused)
+
+
+def sweep_uploads(max_age=None):
+    # Uploads of rolled-back transactions are never confirmed.
+    storage = Post.image.field.storage
+    for name in storage.sweep(
+            lambda name: Post.objects.filter(image=name).exists(),
+            settings.BLOG_UPLOAD_SWEEP_AGE if max_age is None else max_age):
+        delete_derivatives(name)
+
+
+@receiver(post_save, sender=Post)
+def process_saved_image(sender, instance, **kwargs):
+    saved_image = getattr(instance, '_saved_image', None)
+    if saved_image and saved_image != instance.image.name:
+        release_image(instance.image.storage, saved_image)
+    if getattr(instance, '_image_uploaded', False):
+        name = instance.image.name
+        transaction.on_commit(lambda: instance.image.storage.confirm(name))
+        schedule_derivatives(name)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        release_image(instance.image.storage, instance.image.name)
+
+
+def count_saved(sender, instance, created, **kwargs):
+    WRITES.inc(
+        sender._meta.model_name, 'create' if created else 'update'
+    )
+
+
+def count_deleted(sender, instance, **kwargs):
+    WRITES.inc(sender._meta.model_name, 'delete')
+
+
+for model in (Post, Comment):
+    post_save.connect(count_saved, sender=model)
+    post_delete.connect(count_deleted, sender=model)
+
+
+@receiver(post_save, sender=Post)
+def schedule_saved_post(sender, instance, **kwargs):
+    schedule_publication(instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    index_posts([(instance.pk, instance.title, instance.text)])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    remove_posts([instance.pk])
+
+
+# The feed column that refers to each model, see blog.feed.
+FEED_COLUMNS = {
+    Post: 'id',
+    Category: 'category_id',
+    Location: 'location_id',
+    User: 'author_id',
+}
+
+
+def refresh_feed_entries(sender, instance, **kwargs):
+    if not is_login_update(kwargs):
+        refresh_feed(FEED_COLUMNS[sender], [instance.pk])
+
+
+def remember_feed_posts(sender, instance, **kwargs):
+    # SET_NULL clears post.location_id and post.category_id before
+    # post_delete, so the posts are found while they still refer to it.
+    instance._feed_post_ids = list(
+        Post.objects.filter(**{FEED_COLUMNS[sender]: instance.pk})
+        .values_list('id', flat=True)
+    )
+
+
+def refresh_deleted_feed_entries(sender, instance, **kwargs):
+    refresh_feed('id', getattr(instance, '_feed_post_ids', ()))
+
+
+for model in FEED_COLUMNS:
+    post_save.connect(refresh_feed_entries, sender=model)
+    pre_delete.connect(remember_feed_posts, sender=model)
+    post_delete.connect(refresh_deleted_feed_entries, sender=model)
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from functools import partial
+from urllib.parse import quote, unquote
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+TEMPORARY_DIR = '.uploads'
+PENDING_PREFIX = 'pending-'
+RELEASED_PREFIX = 'released-'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    # Every file is stored once, as <dir>/<ab>/<sha256><ext> of its
+    # content, so equal uploads share a single file. Files are not
+    # deleted here but by the Post signals once no post refers to them,
+    # through release(); an upload keeps its own copy until confirm().
+    # The copies in TEMPORARY_DIR are named after the file they belong to,
+    # so sweep() can settle those of rolled-back transactions and of
+    # processes that died.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        temporary_dir = self.path(TEMPORARY_DIR)
+        os.makedirs(temporary_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        content.seek(0)
+        with tempfile.NamedTemporaryFile(
+                dir=temporary_dir, delete=False) as temporary:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary.write(chunk)
+            except BaseException:
+                temporary.close()
+                os.remove(temporary.name)
+                raise
+        digest = digest.hexdigest()
+        name = '/'.join(
+            part for part in (directory, digest[:2], digest + extension)
+            if part
+        )
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pending = self._temporary_path(PENDING_PREFIX, name)
+        os.rename(temporary.name, pending)
+        try:
+            os.link(pending, path)
+        except FileExistsError:
+            pass
+        else:
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+        with self._pending_lock:
+            self._pending.setdefault(name, []).append(pending)
+        return name
+
+    def _temporary_path(self, prefix, name):
+        return os.path.join(
+            self.path(TEMPORARY_DIR),
+            f'{prefix}{quote(name, safe="")}.{uuid.uuid4().hex}'
+        )
+
+    def confirm(self, name):
+        # Called once the post that refers to name is committed. A release
+        # that checked the references before that has moved the file away,
+        # so the copy of the upload is put back.
+        with self._pending_lock:
+            temporaries = self._pending.get(name)
+            if not temporaries:
+                return
+            temporary = temporaries.pop()
+            if not temporaries:
+                del self._pending[name]
+        if os.path.exists(self.path(name)):
+            os.remove(temporary)
+        else:
+            os.replace(temporary, self.path(name))
+
+    def release(self, name, is_used):
+        # Deletes the file unless is_used(). The file is moved aside first:
+        # an upload that reused it is either committed before the check,
+        # or confirms after it and finds the file missing.
+        path = self.path(name)
+        released = self._temporary_path(RELEASED_PREFIX, name)
+        os.makedirs(os.path.dirname(released), exist_ok=True)
+        try:
+            os.rename(path, released)
+        except FileNotFoundError:
+            return False
+        try:
+            used = is_used()
+        except BaseException:
+            os.replace(released, path)
+            raise
+        if used:
+            os.replace(released, path)
+            return False
+        os.remove(released)
+        return True
+
+    def _stale_temporaries(self, max_age):
+        directory = self.path(TEMPORARY_DIR)
+        try:
+            entries = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        deadline = time.time() - max_age
+        for entry in entries:
+            for prefix in (PENDING_PREFIX, RELEASED_PREFIX):
+                if not entry.startswith(prefix):
+                    continue
+                temporary = os.path.join(directory, entry)
+                try:
+                    if os.path.getmtime(temporary) <= deadline:
+                        yield (
+                            unquote(entry[len(prefix):].rsplit('.', 1)[0]),
+                            temporary
+                        )
+                except FileNotFoundError:
+                    pass
+
+    def sweep(self, is_used, max_age):
+        # Settles the copies older than max_age seconds that no confirm()
+        # or release() has finished with: the file is kept in place if
+        # is_used(name), otherwise released. Returns the released names.
+        released = []
+        for name, temporary in self._stale_temporaries(max_age):
+            with self._pending_lock:
+                temporaries = self._pending.get(name, [])
+                if temporary in temporaries:
+                    temporaries.remove(temporary)
+                if not temporaries:
+                    self._pending.pop(name, None)
+            try:
+                if os.path.exists(self.path(name)):
+                    os.remove(temporary)
+                else:
+                    os.replace(temporary, self.path(name))
+            except FileNotFoundError:
+                continue
+            if self.release(name, partial(is_used, name)):
+                released.append(name)
+        return released
@@ -0,0 +1,77 @@
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.cache import (
+    cache_timeout,
+    card_version_names,
+    get_cache,
+    get_versions,
+)
+from blog.images import image_sources
+from blog.instrumentation import count_cache
+
+register = template.Library()
+
+CARD_KEY = 'blog:card:{}:{}'
+CARD_WIDTH = 640
+
+
+@register.simple_tag
+def post_cards(posts):
+    posts = list(posts)
+    cache = get_cache()
+    # A card shows its post with the category, location and author.
+    names = [card_version_names(post) for post in posts]
+    unique = list({name: None for post_names in names for name in post_names})
+    versions = dict(zip(unique, get_versions(*unique)))
+    keys = [
+        CARD_KEY.format(
+            post.id, '-'.join(str(versions[name]) for name in post_names)
+        )
+        for post, post_names in zip(posts, names)
+    ]
+    cards = cache.get_many(keys)
+    count_cache(hits=len(cards), misses=len(keys) - len(cards))
+    rendered = {
+        key: render_to_string('includes/post_card.html', {'post': post})
+        for key, post in zip(keys, posts) if key not in cards
+    }
+    if rendered:
+        cache.set_many(
+            rendered, cache_timeout(settings.BLOG_CARD_CACHE_TIMEOUT)
+        )
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def srcset(variants):
+    return ', '.join(f'{url} {width}w' for url, width in variants if width)
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, loading='lazy'):
+    # <picture> lets the browser pick AVIF or WebP by itself, so cached
+    # pages need no Vary: Accept.
+    sources, fallback, (width, height) = image_sources(
+        post.image, post.image_meta
+    )
+    src = next(
+        (url for url, variant_width in fallback
+         if variant_width is None or variant_width >= CARD_WIDTH),
+        fallback[-1][0]
+    )
+    return {
+        'post': post,
+        'sources': [
+            {'type': mime_type, 'srcset': srcset(variants)}
+            for mime_type, variants in sources
+        ],
+        'src': src,
+        'srcset': srcset(fallback) if len(fallback) > 1 else '',
+        'sizes': f'(max-width: {CARD_WIDTH}px) 100vw, {CARD_WIDTH}px',
+        'width': width,
+        'height': height,
+        'loading': loading,
+    }
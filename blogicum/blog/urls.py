@@ -12,6 +12,7 @@ urlpatterns = [
     path('category/<slug:category_slug>/',
          views.CategoryPostsListView.as_view(),
          name='category_posts'),
+    path('search/', views.SearchListView.as_view(), name='search'),
     path('profile/<str:username>/',
          views.ProfileListView.as_view(),
          name='profile'),
@@ -27,6 +28,9 @@ urlpatterns = [
     path('posts/<int:post_id>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:post_id>/comments/',
+         views.CommentListView.as_view(),
+         name='post_comments'),
     path('posts/<int:post_id>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -1,13 +1,56 @@
-from django.db.models import Count
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from django.utils import timezone
 
-from .models import Post
+from .models import FeedEntry, Post
+
+
+def shared_cache():
+    # Version bumps reach the other processes only through a shared cache.
+    return not isinstance(caches[settings.BLOG_CACHE_ALIAS], LocMemCache)
+
+
+def publication_events():
+    # The events bump versions in the run_tasks process: web workers see
+    # that only through a shared cache, otherwise feeds keep using the
+    # time buckets.
+    return settings.BLOG_PUBLICATION_EVENTS and shared_cache()
+
+
+def feed_now():
+    bucket = settings.BLOG_FEED_NOW_BUCKET
+    now = timezone.now()
+    if not bucket or publication_events():
+        return now
+    # Rounded down: a scheduled post never goes live before its pub_date.
+    return datetime.fromtimestamp(
+        math.floor(now.timestamp() / bucket) * bucket,
+        tz=timezone.utc
+    )
+
+
+def published_q():
+    return Q(
+        pub_date__lte=feed_now(),
+        is_published=True,
+        category__is_published=True
+    )
+
+
+def annotate_visibility(posts):
+    return posts.annotate(is_visible=ExpressionWrapper(
+        published_q(), output_field=BooleanField()
+    ))
 
 
 def filter_posts(
         posts=Post.objects,
         do_related=True,
-        do_annotate=True,
         do_filter=True,
 ):
     if do_related:
@@ -16,14 +59,14 @@ def filter_posts(
             'location',
             'category',
         )
-    if do_annotate:
-        posts = posts.annotate(
-            comment_count=Count('comments')
-        ).order_by(*Post._meta.ordering)
+    posts = posts.order_by(*Post._meta.ordering)
     if do_filter:
-        posts = posts.filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
-        )
+        posts = posts.filter(published_q())
     return posts
+
+
+def feed_posts(**filters):
+    # Visible posts from the feed table, as Post instances.
+    return FeedEntry.objects.filter(
+        pub_date__lte=feed_now(), **filters
+    ).as_posts()
@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag, urlencode
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -9,18 +15,67 @@ from django.views.generic import (
     UpdateView,
 )
 
-from blog.constants import PAGINATE_COUNT
-from blog.models import Category, Comment, Post, User
+from blog.constants import (
+    COMMENTS_PAGINATE_COUNT,
+    PAGINATE_COUNT,
+    SEARCH_QUERY_LENGTH,
+)
+from blog.models import Comment, Post
+from .cache import (
+    PAGE_KEY,
+    PAGE_VERSION_NAMES,
+    cache_timeout,
+    count_page_cache,
+    get_cache,
+    get_published_category,
+    get_user_by_username,
+    get_versions,
+    page_validators,
+)
 from .forms import PostForm, ProfileEditForm, CommentForm
-from .utils import filter_posts
+from .metrics import REGISTRY
+from .paginators import (
+    CachedCountPaginator,
+    FeedPaginator,
+    InvalidCursor,
+    KeysetPaginator,
+)
+from .search import search_posts
+from .utils import annotate_visibility, feed_posts, filter_posts
+
+
+def get_visible_post_or_404(request, post_id):
+    post = get_object_or_404(
+        annotate_visibility(filter_posts(do_filter=False)),
+        pk=post_id
+    )
+    if not post.is_visible and post.author_id != request.user.pk:
+        raise Http404('Публикация не найдена.')
+    return post
+
+
+def paginate_comments(post, cursor=None):
+    try:
+        return KeysetPaginator(
+            post.comments.select_related('author'),
+            COMMENTS_PAGINATE_COUNT
+        ).page(cursor)
+    except InvalidCursor:
+        raise Http404('Неверный курсор комментариев.')
 
 
 class PostMixin():
     model = Post
     pk_url_kwarg = 'post_id'
 
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, 'object', None):
+            return self.object
+        return super().get_object(queryset)
+
     def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
+        self.object = self.get_object()
+        if self.object.author_id != request.user.pk:
             return redirect(
                 'blog:post_detail',
                 self.kwargs[self.pk_url_kwarg]
@@ -28,51 +83,185 @@ class PostMixin():
         return super().dispatch(request, *args, **kwargs)
 
 
-class IndexListView(ListView):
+class CachedPageMixin:
+    def get_version_names(self):
+        raise NotImplementedError
+
+    def set_validators(self, response, etag, last_modified):
+        response.headers['ETag'] = quote_etag(etag)
+        response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        anonymous = not request.user.is_authenticated
+        names = (*self.get_version_names(), *PAGE_VERSION_NAMES)
+        if not anonymous:
+            names = (*names, f'author:{request.user.username}')
+        etag, last_modified = page_validators(request, names)
+        response = get_conditional_response(
+            request, etag=quote_etag(etag), last_modified=last_modified
+        )
+        if response is not None:
+            return self.set_validators(response, etag, last_modified)
+        if anonymous:
+            cache = get_cache()
+            key = PAGE_KEY.format(etag)
+            response = cache.get(key)
+            if response is not None:
+                count_page_cache('hit')
+                return response
+            count_page_cache('miss')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        self.set_validators(response, etag, last_modified)
+        patch_cache_control(
+            response, private=not anonymous, public=anonymous,
+            max_age=0, must_revalidate=True
+        )
+        if anonymous and not response.cookies:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, rendered,
+                    cache_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT)
+                )
+            )
+        return response
+
+
+class PostsListMixin:
     model = Post
-    template_name = 'blog/index.html'
     paginate_by = PAGINATE_COUNT
-    queryset = filter_posts()
+    cursor_kwarg = 'cursor'
+    paginator_classes = {
+        'offset': FeedPaginator,
+        'cached_count': CachedCountPaginator,
+    }
+
+    def get_count_scope(self):
+        raise NotImplementedError
+
+    def get_paginator_class(self):
+        return self.paginator_classes[settings.BLOG_PAGINATION_MODE]
+
+    def get_paginator(self, *args, **kwargs):
+        self.paginator_class = self.get_paginator_class()
+        if issubclass(self.paginator_class, CachedCountPaginator):
+            kwargs['count_key'] = ':'.join(map(str, (
+                *self.get_count_scope(),
+                *get_versions(*self.get_version_names(), *PAGE_VERSION_NAMES),
+            )))
+        return super().get_paginator(*args, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if settings.BLOG_PAGINATION_MODE != 'keyset' and cursor is None:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor:
+            raise Http404('Неверный курсор страницы.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class IndexListView(CachedPageMixin, PostsListMixin, ListView):
+    template_name = 'blog/index.html'
 
+    def get_version_names(self):
+        return ('feed',)
 
-class CategoryPostsListView(ListView):
-    model = Post
+    def get_count_scope(self):
+        return ('feed',)
+
+    def get_queryset(self):
+        return feed_posts()
+
+
+class CategoryPostsListView(CachedPageMixin, PostsListMixin, ListView):
     template_name = 'blog/category.html'
-    paginate_by = PAGINATE_COUNT
 
-    def get_category(self):
-        return get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True
-        )
+    def get_version_names(self):
+        return (f'category:{self.kwargs["category_slug"]}',)
+
+    @cached_property
+    def category(self):
+        category = get_published_category(self.kwargs['category_slug'])
+        if category is None:
+            raise Http404('Категория не найдена.')
+        return category
+
+    def get_count_scope(self):
+        return ('category', self.category.id)
 
     def get_queryset(self):
-        return filter_posts(self.get_category().posts)
+        return feed_posts(category_id=self.category.id)
 
     def get_context_data(self, **kwargs):
-        return super().get_context_data(**kwargs, category=self.get_category())
+        return super().get_context_data(**kwargs, category=self.category)
 
 
-class ProfileListView(ListView):
-    model = Post
+class ProfileListView(CachedPageMixin, PostsListMixin, ListView):
     template_name = 'blog/profile.html'
-    paginate_by = PAGINATE_COUNT
 
-    def get_author(self):
-        return get_object_or_404(
-            User,
-            username=self.kwargs['username']
-        )
+    def get_version_names(self):
+        return (f'author:{self.kwargs["username"]}',)
+
+    @cached_property
+    def author(self):
+        author = get_user_by_username(self.kwargs['username'])
+        if author is None:
+            raise Http404('Пользователь не найден.')
+        return author
+
+    def get_count_scope(self):
+        return ('author', self.author.id, self.author == self.request.user)
+
+    def get_queryset(self):
+        # The author also sees the posts that are not in the feed.
+        if self.author == self.request.user:
+            return filter_posts(self.author.posts, do_filter=False)
+        return feed_posts(author_id=self.author.id)
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(**kwargs, profile=self.author)
+
+
+class SearchListView(CachedPageMixin, PostsListMixin, ListView):
+    template_name = 'blog/search.html'
+
+    def get_version_names(self):
+        return ('feed',)
+
+    @cached_property
+    def query(self):
+        return self.request.GET.get('q', '').strip()[:SEARCH_QUERY_LENGTH]
+
+    def get_count_scope(self):
+        return ('search', self.query)
 
     def get_queryset(self):
-        return filter_posts(
-            self.get_author().posts,
-            do_filter=(self.get_author() != self.request.user)
+        if not self.query:
+            return Post.objects.none()
+        return search_posts(filter_posts(), self.query)
+
+    def get_paginator_class(self):
+        return self.paginator_classes.get(
+            settings.BLOG_PAGINATION_MODE, CachedCountPaginator
         )
 
+    def paginate_queryset(self, queryset, page_size):
+        # Results are ordered by rank, cursors only follow (pub_date, id).
+        return ListView.paginate_queryset(self, queryset, page_size)
+
     def get_context_data(self, **kwargs):
-        return super().get_context_data(**kwargs, profile=self.get_author())
+        return super().get_context_data(
+            **kwargs,
+            query=self.query,
+            page_query=urlencode({'q': self.query}) + '&',
+        )
 
 
 class ProfileUpdateView(LoginRequiredMixin, UpdateView):
@@ -99,30 +288,42 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return reverse('blog:profile', args=[self.request.user.username])
 
 
-class PostDetailView(DetailView):
+class PostDetailView(CachedPageMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
 
+    def get_version_names(self):
+        return (f'post:{self.kwargs["post_id"]}',)
+
     def get_object(self):
-        post = get_object_or_404(
-            Post,
-            pk=self.kwargs['post_id']
-        )
-        if post.author == self.request.user:
-            return post
-        return get_object_or_404(
-            filter_posts(
-                do_annotate=False,
-                do_related=False
-            ),
-            pk=self.kwargs['post_id'],
-        )
+        return get_visible_post_or_404(self.request, self.kwargs['post_id'])
 
     def get_context_data(self, **kwargs):
         return super().get_context_data(
             **kwargs,
             form=CommentForm(),
-            comments=self.object.comments.select_related('author')
+            comments=paginate_comments(
+                self.object, self.request.GET.get('comments')
+            )
+        )
+
+
+class CommentListView(CachedPageMixin, DetailView):
+    model = Post
+    template_name = 'includes/comment_list.html'
+
+    def get_version_names(self):
+        return (f'post:{self.kwargs["post_id"]}',)
+
+    def get_object(self):
+        return get_visible_post_or_404(self.request, self.kwargs['post_id'])
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            **kwargs,
+            comments=paginate_comments(
+                self.object, self.request.GET.get('cursor')
+            )
         )
 
 
@@ -163,7 +364,8 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
             Post,
             pk=self.kwargs['post_id']
         )
-        return super().form_valid(form)
+        with transaction.atomic():
+            return super().form_valid(form)
 
     def get_success_url(self):
         return reverse(
@@ -177,8 +379,14 @@ class CommentMixin(LoginRequiredMixin):
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
 
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, 'object', None):
+            return self.object
+        return super().get_object(queryset)
+
     def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
+        self.object = self.get_object()
+        if self.object.author_id != request.user.pk:
             return redirect('blog:post_detail', self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
@@ -193,3 +401,15 @@ class CommentUpdateView(CommentMixin, UpdateView):
 
 class CommentDeleteView(CommentMixin, DeleteView):
     ...
+
+
+def metrics(request):
+    if not settings.BLOG_METRICS_ENABLED or not (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in settings.BLOG_METRICS_IPS
+    ):
+        raise Http404
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,13 @@
+from django.urls import include, path
+
+from .urls import handler404, handler500, urlpatterns as wsgi_urlpatterns
+
+__all__ = ('handler404', 'handler500', 'urlpatterns')
+
+# ROOT_URLCONF with the async blog views, used for ASGI requests by
+# blog.middleware.AsgiUrlconfMiddleware.
+urlpatterns = [
+    path('', include('blog.async_urls', namespace='blog'))
+    if getattr(pattern, 'namespace', None) == 'blog' else pattern
+    for pattern in wsgi_urlpatterns
+]
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.MetricsMiddleware',
+    'blog.middleware.ServerTimingMiddleware',
+    'blog.middleware.AsgiUrlconfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,10 +60,52 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+# Pages, cards and lookups are invalidated by version bumps and key
+# deletions, which every process must see: outside development the cache
+# is a file cache shared by the workers of this host (use Memcached for
+# several hosts). A process-local LocMemCache is only right for a single
+# process; with it the blog caches expire after BLOG_LOCAL_CACHE_TIMEOUT
+# seconds and publication events are off (see blog.utils.shared_cache).
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'BLOG_CACHE_DIR', '/var/tmp/blogicum_cache'
+            ),
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
+# SQLite shared by several worker processes (see blogicum/sqlite3/base.py):
+# WAL lets readers run alongside the single writer, writes wait up to
+# 'timeout' seconds for the lock instead of failing, and atomic blocks take
+# the lock when they begin, so only writes go in atomic blocks and
+# ATOMIC_REQUESTS stays off.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                # Durable on commit except for power loss, fsync per
+                # checkpoint only.
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                # Negative: in KiB, 64 MiB per connection.
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
     }
 }
 
@@ -107,3 +153,94 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# 'offset' — numbered pages with COUNT(*) on every request,
+# 'cached_count' — numbered pages, N + 1 rows per page and a total cached
+# for BLOG_COUNT_CACHE_TIMEOUT seconds,
+# 'keyset' — opaque cursors on (pub_date, id), constant cost per page
+# however deep it is.
+BLOG_PAGINATION_MODE = 'cached_count'
+BLOG_COUNT_CACHE_TIMEOUT = 60
+
+# Feeds compare pub_date with "now" rounded down to this many seconds, so
+# the query and its cache keys stay the same within a bucket. Scheduled
+# posts go live at the end of the bucket they fall into, never before
+# their pub_date; 0 disables rounding, and so do BLOG_PUBLICATION_EVENTS.
+BLOG_FEED_NOW_BUCKET = 30
+
+# Anonymous feed and post pages are cached under versioned keys that
+# model signals bump. With a shared cache the timeouts only bound memory
+# use; with a process-local one they are cut to BLOG_LOCAL_CACHE_TIMEOUT,
+# the longest other workers may serve a stale page or card.
+BLOG_CACHE_ALIAS = 'default'
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_LOOKUP_CACHE_TIMEOUT = 60 * 60
+BLOG_LOCAL_CACHE_TIMEOUT = 30
+
+# Share of requests (0..1) for which DB, view, template and cache timings
+# are collected, logged to "blog.timing" and, if enabled, sent back as a
+# Server-Timing header. Queries are only counted (for /metrics as well) on
+# these requests.
+BLOG_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+BLOG_SERVER_TIMING_HEADER = DEBUG
+
+# Prometheus text format at /metrics, for staff users and for REMOTE_ADDR
+# in BLOG_METRICS_IPS (scrape the application server directly, not through
+# a proxy that all clients share). Under a multi-process server point
+# BLOG_METRICS_DIR at a directory shared by all workers (emptied before
+# start): each worker dumps its values there at most every
+# BLOG_METRICS_FLUSH_INTERVAL seconds and a scrape sums them.
+BLOG_METRICS_ENABLED = True
+BLOG_METRICS_IPS = INTERNAL_IPS
+BLOG_METRICS_DIR = os.environ.get('BLOG_METRICS_DIR')
+BLOG_METRICS_FLUSH_INTERVAL = 5
+
+# Background tasks (image encoding, password reset mail) are stored in the
+# database and run by "manage.py run_tasks". A failed task is retried
+# after BLOG_TASK_RETRY_DELAY seconds, doubled on every attempt; a task
+# whose worker has not finished it within BLOG_TASK_LEASE seconds is given
+# to another worker. BLOG_TASKS_EAGER runs tasks in the process that
+# enqueued them, right after commit, for development without a worker.
+# Tasks done BLOG_TASK_KEEP_DONE seconds after they were enqueued are
+# deleted by run_tasks.
+BLOG_TASKS_EAGER = DEBUG
+BLOG_TASK_RETRY_DELAY = 30
+BLOG_TASK_LEASE = 10 * 60
+BLOG_TASK_KEEP_DONE = 60 * 60 * 24
+
+# Copies of uploaded images that no commit has confirmed (the transaction
+# rolled back or the process died) are settled by run_tasks once they are
+# BLOG_UPLOAD_SWEEP_AGE seconds old.
+BLOG_UPLOAD_SWEEP_AGE = 60 * 60
+# How often an idle run_tasks deletes old tasks and settles uploads.
+BLOG_HOUSEKEEPING_INTERVAL = 10 * 60
+
+# A post saved with a future pub_date schedules a task for that moment
+# that re-renders the pages it appears on, so feeds are cached without
+# BLOG_FEED_NOW_BUCKET and show the post on time. Needs a running
+# run_tasks worker, hence off when tasks run eagerly, and a shared cache,
+# which the worker bumps the versions in: ignored with LocMemCache.
+BLOG_PUBLICATION_EVENTS = not BLOG_TASKS_EAGER
+
+# Under ASGI the feeds and post pages are served by async views from
+# BLOG_ASGI_URLCONF (None keeps the sync ones), which run their queries and
+# rendering in a pool of BLOG_ASYNC_DB_WORKERS threads, each with its own
+# database connection.
+BLOG_ASGI_URLCONF = 'blogicum.asgi_urls'
+BLOG_ASYNC_DB_WORKERS = 8
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
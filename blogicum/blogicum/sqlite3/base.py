@@ -0,0 +1,46 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The sqlite3 backend with two more OPTIONS, besides the arguments of
+    # sqlite3.connect():
+    # 'pragmas' — {name: value} run on every new connection;
+    # 'transaction_mode' — how atomic blocks begin. With 'IMMEDIATE' a
+    # block takes the write lock up front and waits for it for 'timeout'
+    # seconds; a deferred block that reads first cannot wait once another
+    # connection has written, and fails with "database is locked".
+    # Under 'IMMEDIATE' every atomic block is a write transaction, even one
+    # that only reads: reads belong outside atomic(), where WAL runs them
+    # alongside the writer, and ATOMIC_REQUESTS would serialize all
+    # requests, so it is refused.
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        mode = kwargs.pop('transaction_mode', None)
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode must be one of {TRANSACTION_MODES}, '
+                f'not {mode!r}.'
+            )
+        if mode is not None and mode.upper() != 'DEFERRED' and (
+                self.settings_dict['ATOMIC_REQUESTS']):
+            raise ImproperlyConfigured(
+                f'ATOMIC_REQUESTS cannot be used with transaction_mode '
+                f'{mode!r}: every request would wait for the write lock.'
+            )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -2,16 +2,26 @@ from django.conf.urls.static import static
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.views import PasswordResetView
 from django.urls import include, path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.forms import QueuedPasswordResetForm
+from blog.views import metrics
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.custom_500'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('pages/', include('pages.urls', namespace='pages')),
     path('', include('blog.urls', namespace='blog')),
+    path(
+        'auth/password_reset/',
+        PasswordResetView.as_view(form_class=QueuedPasswordResetForm),
+        name='password_reset',
+    ),
     path('auth/', include('django.contrib.auth.urls')),
     path(
         'auth/registration/',
@@ -1,6 +1,7 @@
 import os
 import re
 import time
+from contextlib import contextmanager
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
@@ -19,11 +20,14 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +45,31 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager failing the test if the block runs more than
+    `budget` queries; yields the captured queries."""
+
+    @contextmanager
+    def within(budget: int, label: str = ""):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = [query["sql"] for query in ctx.captured_queries]
+        assert len(executed) <= budget, (
+            f"Убедитесь, что {label or 'запрос'} выполняет не больше"
+            f" {budget} запросов к базе данных, сейчас их {len(executed)}:\n"
+            + "\n".join(executed)
+        )
+
+    return within
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -360,7 +389,8 @@ def cleanup(request):
     for root, dirs, files in os.walk(image_dir):
         for filename in files:
             if (
-                    filename.endswith(".jpg")
+                    os.path.basename(root) == ".uploads"
+                    or filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
             ):
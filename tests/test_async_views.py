@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import resolve
+
+from blog import async_views
+
+
+@pytest.fixture
+def async_get(settings):
+    settings.BLOG_TIMING_SAMPLE_RATE = 1.0
+    settings.BLOG_SERVER_TIMING_HEADER = True
+    client = AsyncClient()
+
+    def get(url):
+        return async_to_sync(client.get)(url)
+
+    return get
+
+
+def test_asgi_urlconf_uses_async_views():
+    for url, view in (
+        ("/", async_views.IndexListView),
+        ("/posts/1/", async_views.PostDetailView),
+        ("/category/news/", async_views.CategoryPostsListView),
+        ("/profile/someone/", async_views.ProfileListView),
+    ):
+        match = resolve(url, urlconf="blogicum.asgi_urls")
+        assert match.func.view_class is view, (
+            f"Убедитесь, что под ASGI адрес `{url}` обслуживает асинхронное"
+            " представление."
+        )
+    assert resolve(
+        "/posts/create/", urlconf="blogicum.asgi_urls"
+    ).view_name == "blog:create_post"
+
+
+# The pool threads open their own connections, so the data is committed.
+@pytest.mark.django_db(transaction=True)
+def test_async_pages_query_in_pool(
+        monkeypatch, async_get, post_with_published_location
+):
+    post = post_with_published_location
+    threads = set()
+    respond = async_views.AsyncViewMixin.respond
+
+    def record_thread(self, *args):
+        threads.add(threading.current_thread().name)
+        return respond(self, *args)
+
+    monkeypatch.setattr(async_views.AsyncViewMixin, "respond", record_thread)
+    for url in (
+        "/", f"/posts/{post.id}/", f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ):
+        response = async_get(url)
+        assert response.status_code == 200
+        assert post.title in response.content.decode(), (
+            f"Убедитесь, что асинхронная страница `{url}` показывает"
+            " публикацию."
+        )
+    assert threads and all(name.startswith("blog-db") for name in threads), (
+        "Убедитесь, что асинхронные представления работают с базой данных"
+        " в ограниченном пуле потоков."
+    )
+    header = async_get("/").headers.get("Server-Timing", "")
+    assert "queries;" in header
+    assert async_get("/posts/0/").status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_page_db_time_is_reported(
+        async_get, post_with_published_location
+):
+    header = async_get(
+        f"/posts/{post_with_published_location.id}/"
+    ).headers.get("Server-Timing", "")
+    assert "db;dur=" in header and 'queries;desc="0"' not in header, (
+        "Убедитесь, что запросы к базе данных из пула потоков учитываются"
+        f" в заголовке `Server-Timing`: `{header}`."
+    )
@@ -0,0 +1,48 @@
+import pytest
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_post_cards_are_cached_by_post_version(
+        user_client, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    post = max(posts, key=lambda item: (item.pub_date, item.id))
+    assert post.title in user_client.get("/").content.decode()
+
+    Post.objects.filter(pk=post.pk).update(title="Изменено без сигналов")
+    assert post.title in user_client.get("/").content.decode(), (
+        "Убедитесь, что карточки публикаций берутся из кэша фрагментов."
+    )
+
+    post.refresh_from_db()
+    post.title = "Изменено через save"
+    post.save()
+    content = user_client.get("/").content.decode()
+    assert "Изменено через save" in content, (
+        "Убедитесь, что кэш карточки сбрасывается при изменении публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_post_cards_are_fetched_with_one_get_many(
+        monkeypatch, user_client, many_posts_with_published_locations
+):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    calls = []
+    original = LocMemCache.get_many
+
+    def counting_get_many(self, keys, *args, **kwargs):
+        keys = list(keys)
+        if any(key.startswith("blog:card:") for key in keys):
+            calls.append(keys)
+        return original(self, keys, *args, **kwargs)
+
+    monkeypatch.setattr(LocMemCache, "get_many", counting_get_many)
+    user_client.get("/")
+    assert len(calls) == 1 and len(calls[0]) == 10, (
+        "Убедитесь, что все карточки страницы запрашиваются из кэша одним"
+        " вызовом `get_many`."
+    )
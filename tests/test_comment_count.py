@@ -0,0 +1,85 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, FeedEntry, Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_create_and_delete(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.comment_count == 0
+    for i in range(3):
+        response = user_client.post(
+            f"/posts/{post.id}/comment/", {"text": f"Comment {i}"}
+        )
+        assert response.status_code == HTTPStatus.FOUND
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при добавлении комментария увеличивается счётчик"
+        " комментариев публикации."
+    )
+
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик"
+        " комментариев публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_moved_comment(
+        mixer, post_with_published_location, post_with_another_category
+):
+    comment = mixer.blend(Comment, post=post_with_published_location)
+    comment.post = post_with_another_category
+    comment.save()
+    counts = dict(Post.objects.values_list("id", "comment_count"))
+    assert counts[post_with_published_location.id] == 0
+    assert counts[post_with_another_category.id] == 1
+
+
+@pytest.mark.django_db
+def test_feed_query_does_not_touch_comments(
+        user_client, comment_to_a_post
+):
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    assert response.status_code == HTTPStatus.OK
+    assert "Комментарии (1)" in response.content.decode("utf-8")
+    assert not any(
+        "blog_comment" in q["sql"] for q in ctx.captured_queries
+    ), (
+        "Убедитесь, что лента публикаций берёт количество комментариев из"
+        " сохранённого поля, не обращаясь к таблице комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_rebuild_comment_count_command(comment_to_a_post):
+    Post.objects.update(comment_count=42)
+    call_command("rebuild_comment_count", stdout=StringIO())
+    assert Post.objects.get().comment_count == 1
+
+
+@pytest.mark.django_db
+def test_rebuild_refreshes_cached_pages(
+        client, comment_to_a_post, django_capture_on_commit_callbacks
+):
+    for model in (Post, FeedEntry):
+        model.objects.update(comment_count=42)
+    assert "Комментарии (42)" in client.get("/").content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("rebuild_comment_count", stdout=StringIO())
+    assert "Комментарии (1)" in client.get("/").content.decode(), (
+        "Убедитесь, что после пересчёта кэшированные страницы и карточки"
+        " показывают новое количество комментариев."
+    )
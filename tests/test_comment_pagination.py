@@ -0,0 +1,55 @@
+import re
+from http import HTTPStatus
+
+import pytest
+
+from blog.constants import COMMENTS_PAGINATE_COUNT
+
+N_COMMENTS = COMMENTS_PAGINATE_COUNT * 2 + 5
+FRAGMENT_URL_RE = re.compile(r'data-fragment-url="([^"]+)"')
+COMMENT_ID_RE = re.compile(r'name="comment_(\d+)"')
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(N_COMMENTS).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+
+@pytest.mark.django_db
+def test_detail_page_renders_bounded_comments(client, many_comments):
+    post_id = many_comments[0].post_id
+    response = client.get(f"/posts/{post_id}/")
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode()
+    shown = [int(pk) for pk in COMMENT_ID_RE.findall(content)]
+    assert shown == [c.id for c in many_comments[:COMMENTS_PAGINATE_COUNT]], (
+        "Убедитесь, что на странице публикации показывается только первая"
+        " порция комментариев, «от старых к новым»."
+    )
+
+    while True:
+        match = FRAGMENT_URL_RE.search(content)
+        if not match:
+            break
+        fragment = client.get(match.group(1).replace("&amp;", "&"))
+        assert fragment.status_code == HTTPStatus.OK
+        assert "<html" not in fragment.content.decode()
+        content = fragment.content.decode()
+        shown.extend(int(pk) for pk in COMMENT_ID_RE.findall(content))
+    assert shown == [comment.id for comment in many_comments], (
+        "Убедитесь, что следующие порции комментариев загружаются по ссылке"
+        " «Показать ещё комментарии» без пропусков и повторов."
+    )
+
+
+@pytest.mark.django_db
+def test_comments_fragment_follows_post_visibility(
+        another_user_client, many_comments
+):
+    post = many_comments[0].post
+    post.is_published = False
+    post.save()
+    response = another_user_client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
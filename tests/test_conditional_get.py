@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("client_fixture", ["client", "user_client"])
+def test_unchanged_pages_return_not_modified(
+        request, client_fixture, post_with_published_location
+):
+    client = request.getfixturevalue(client_fixture)
+    post = post_with_published_location
+    for url in (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    ):
+        # The first response may set the CSRF cookie the validators
+        # depend on for logged-in users.
+        client.get(url)
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header("ETag")
+        assert response.has_header("Last-Modified")
+
+        with CaptureQueriesContext(connection) as ctx:
+            not_modified = client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что страница `{url}` возвращает 304, если она не"
+            " изменилась с прошлого запроса."
+        )
+        assert not_modified.content == b""
+        assert not any(
+            "blog_post" in query["sql"] for query in ctx.captured_queries
+        )
+
+        by_date = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert by_date.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_changed_post_is_sent_again(client, comment_to_a_post):
+    url = f"/posts/{comment_to_a_post.post_id}/"
+    etag = client.get(url)["ETag"]
+    comment_to_a_post.text = "Исправленный текст"
+    comment_to_a_post.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после изменения комментария страница публикации"
+        " отдаётся заново."
+    )
+    assert "Исправленный текст" in response.content.decode()
+    assert response["ETag"] != etag
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.feed import rebuild_feed
+from blog.models import Post
+from conftest import N_PER_PAGE
+
+N_POSTS = N_PER_PAGE * 15 + 3
+
+
+@pytest.fixture
+def lots_of_posts(user, published_category):
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            title=f"Post {i}", text="text", author=user,
+            category=published_category,
+            pub_date=now - timezone.timedelta(minutes=i + 1),
+        )
+        for i in range(N_POSTS)
+    )
+    rebuild_feed()
+
+
+def _get_sql(client, url, data=None):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, data)
+    return response, [query["sql"] for query in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_count_is_cached_between_requests(
+        settings, user_client, lots_of_posts
+):
+    settings.BLOG_PAGINATION_MODE = "cached_count"
+    _, first = _get_sql(user_client, "/")
+    assert sum("COUNT(*)" in sql for sql in first) == 1
+    response, second = _get_sql(user_client, "/", {"page": 3})
+    assert response.status_code == HTTPStatus.OK
+    assert not any("COUNT(*)" in sql for sql in second), (
+        "Убедитесь, что общее количество публикаций берётся из кэша, а не"
+        " подсчитывается на каждый запрос."
+    )
+    assert any(f"LIMIT {N_PER_PAGE + 1}" in sql for sql in second)
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+@pytest.mark.django_db
+def test_last_page_and_window(settings, user_client, lots_of_posts):
+    settings.BLOG_PAGINATION_MODE = "cached_count"
+    last = N_POSTS // N_PER_PAGE + 1
+    page = user_client.get("/", {"page": last}).context["page_obj"]
+    assert not page.has_next()
+    assert len(page) == N_POSTS % N_PER_PAGE
+    assert page.paginator.num_pages == last
+    assert user_client.get(
+        "/", {"page": last + 1}
+    ).status_code == HTTPStatus.NOT_FOUND
+
+    page = user_client.get("/", {"page": 8}).context["page_obj"]
+    window = list(page.page_window)
+    assert window == [1, "…", 6, 7, 8, 9, 10, "…", last], (
+        "Убедитесь, что в пагинаторе выводится окно номеров страниц вокруг"
+        " текущей, а не все номера."
+    )
+
+
+@pytest.mark.django_db
+def test_count_key_follows_the_feed_version(
+        settings, user_client, lots_of_posts, user, published_category
+):
+    settings.BLOG_PAGINATION_MODE = "cached_count"
+    user_client.get("/")
+    Post.objects.create(
+        title="New post", text="text", author=user,
+        category=published_category,
+        pub_date=timezone.now() - timezone.timedelta(minutes=1),
+    )
+    _, sql = _get_sql(user_client, "/", {"page": 2})
+    assert sum("COUNT(*)" in query for query in sql) == 1, (
+        "Убедитесь, что после изменения ленты количество публикаций"
+        " подсчитывается заново."
+    )
+    _, sql = _get_sql(user_client, f"/category/{published_category.slug}/")
+    assert sum("COUNT(*)" in query for query in sql) == 1, (
+        "Убедитесь, что у разных лент разные закэшированные количества."
+    )
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+
+# Session and user lookups, the post with its relations and visibility,
+# and the first page of comments with their authors.
+N_QUERIES_LOGGED_IN = 4
+N_QUERIES_ANONYMOUS = 2
+
+
+@pytest.fixture
+def commented_post(mixer, user, another_user, post_with_published_location):
+    mixer.cycle(5).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=mixer.sequence(user, another_user),
+    )
+    return post_with_published_location
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("client_fixture", "n_queries"),
+    [
+        ("user_client", N_QUERIES_LOGGED_IN),
+        ("another_user_client", N_QUERIES_LOGGED_IN),
+        ("client", N_QUERIES_ANONYMOUS),
+    ],
+    ids=["author", "reader", "anonymous"],
+)
+def test_post_detail_query_count(
+        request, django_assert_num_queries, client_fixture, n_queries,
+        commented_post
+):
+    client = request.getfixturevalue(client_fixture)
+    with django_assert_num_queries(n_queries):
+        response = client.get(f"/posts/{commented_post.id}/")
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_hidden_post_detail_query_count(
+        django_assert_num_queries, another_user_client, commented_post
+):
+    commented_post.is_published = False
+    commented_post.save()
+    with django_assert_num_queries(N_QUERIES_LOGGED_IN - 1):
+        response = another_user_client.get(f"/posts/{commented_post.id}/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
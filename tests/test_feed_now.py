@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog import utils
+
+
+def _index_ids(client):
+    return [post.id for post in client.get("/").context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_scheduled_post_appears_without_restart(
+        monkeypatch, mixer, user_client, published_category
+):
+    now = timezone.now()
+    post = mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=now + timedelta(minutes=5),
+    )
+    assert post.id not in _index_ids(user_client)
+
+    monkeypatch.setattr(
+        utils.timezone, "now", lambda: now + timedelta(minutes=6)
+    )
+    assert post.id in _index_ids(user_client), (
+        "Убедитесь, что отложенная публикация появляется на главной странице"
+        " после наступления даты публикации без перезапуска сервера."
+    )
+
+
+def test_feed_now_is_stable_within_bucket(settings, monkeypatch):
+    settings.BLOG_FEED_NOW_BUCKET = 30
+    start = timezone.now().replace(second=1, microsecond=0)
+    boundaries = set()
+    for seconds in range(0, 29, 7):
+        monkeypatch.setattr(
+            utils.timezone, "now",
+            lambda: start + timedelta(seconds=seconds)
+        )
+        boundaries.add(utils.feed_now())
+    assert len(boundaries) == 1
+    assert boundaries.pop() == start.replace(second=0), (
+        "Убедитесь, что текущее время ленты округляется вниз и отложенная"
+        " публикация не появляется раньше своей даты."
+    )
+
+
+@pytest.mark.django_db
+def test_scheduled_post_is_not_shown_early(
+        settings, monkeypatch, mixer, user_client, published_category
+):
+    settings.BLOG_FEED_NOW_BUCKET = 30
+    pub_date = timezone.now().replace(second=20, microsecond=0)
+    post = mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=pub_date,
+    )
+    monkeypatch.setattr(
+        utils.timezone, "now", lambda: pub_date - timedelta(seconds=5)
+    )
+    assert post.id not in _index_ids(user_client)
+    assert user_client.get(f"/posts/{post.id}/").status_code == 404, (
+        "Убедитесь, что отложенная публикация недоступна до даты"
+        " публикации."
+    )
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import FeedEntry
+
+
+@pytest.fixture
+def entry(post_with_published_location):
+    return FeedEntry.objects.get(pk=post_with_published_location.pk)
+
+
+@pytest.mark.django_db
+def test_entry_follows_post_and_its_relations(
+        mixer, user, entry, post_with_published_location
+):
+    post = post_with_published_location
+    assert (entry.title, entry.author_username, entry.category_slug) == (
+        post.title, user.username, post.category.slug
+    )
+    assert entry.location_name == post.location.name
+
+    mixer.blend("blog.Comment", post=post)
+    user.username = "renamed"
+    user.save()
+    post.location.is_published = False
+    post.location.save()
+    entry.refresh_from_db()
+    assert entry.comment_count == 1
+    assert entry.author_username == "renamed", (
+        "Убедитесь, что записи ленты обновляются при изменении автора."
+    )
+    assert entry.location_name == ""
+
+    post.category.is_published = False
+    post.category.save()
+    assert not FeedEntry.objects.exists(), (
+        "Убедитесь, что в ленте нет публикаций скрытых категорий."
+    )
+    post.category.is_published = True
+    post.category.save()
+    post.is_published = False
+    post.save()
+    assert not FeedEntry.objects.exists(), (
+        "Убедитесь, что снятая с публикации публикация удаляется из ленты."
+    )
+
+
+@pytest.mark.django_db
+def test_entry_is_removed_with_post(entry, post_with_published_location):
+    post_with_published_location.delete()
+    assert not FeedEntry.objects.exists()
+
+
+@pytest.mark.django_db
+def test_posts_stay_in_feed_when_location_is_deleted(
+        mixer, user, published_location, published_category
+):
+    posts = mixer.cycle(4).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+    )
+    published_location.delete()
+    entries = FeedEntry.objects.filter(pk__in=[post.pk for post in posts])
+    assert entries.count() == 4, (
+        "Убедитесь, что публикации удалённого местоположения остаются в"
+        " ленте."
+    )
+    assert not entries.exclude(location_id=None).exists()
+
+
+@pytest.mark.django_db
+def test_feed_reads_only_the_feed_table(
+        user_client, many_posts_with_published_locations
+):
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    posts = list(response.context["page_obj"])
+    assert len(posts) == 10
+    feed_queries = [
+        query["sql"] for query in ctx.captured_queries
+        if "blog_feedentry" in query["sql"]
+    ]
+    assert feed_queries and not any(
+        "JOIN" in sql or "blog_post" in sql for sql in feed_queries
+    ), (
+        "Убедитесь, что лента читается из таблицы ленты без соединений с"
+        " другими таблицами."
+    )
+    content = response.content.decode()
+    assert all(post.author.username in content for post in posts)
+    assert all(post.location.name in content for post in posts)
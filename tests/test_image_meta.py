@@ -0,0 +1,59 @@
+import hashlib
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import Post
+
+
+@pytest.fixture
+def image_bytes():
+    buffer = BytesIO()
+    Image.new("RGB", (300, 200), color=(10, 20, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_post(settings, tmp_path, mixer, user, image_bytes):
+    settings.MEDIA_ROOT = tmp_path
+    return mixer.blend(
+        "blog.Post", author=user,
+        image=ImageFile(BytesIO(image_bytes), name="meta.jpg"),
+    )
+
+
+def _expected_meta(image_bytes):
+    return {
+        "width": 300,
+        "height": 200,
+        "size": len(image_bytes),
+        "hash": hashlib.sha256(image_bytes).hexdigest(),
+    }
+
+
+@pytest.mark.django_db
+def test_meta_is_stored_on_upload(image_post, image_bytes):
+    image_post.refresh_from_db()
+    assert image_post.image_meta == _expected_meta(image_bytes), (
+        "Убедитесь, что при загрузке изображения сохраняются его размеры,"
+        " объём и хеш."
+    )
+    image_post.image = None
+    image_post.save()
+    image_post.refresh_from_db()
+    assert image_post.image_meta == {}
+
+
+@pytest.mark.django_db
+def test_backfill_command(image_post, image_bytes):
+    Post.objects.filter(pk=image_post.pk).update(image_meta={})
+    out = StringIO()
+    call_command("backfill_image_meta", workers=2, stdout=out)
+    image_post.refresh_from_db()
+    assert image_post.image_meta == {
+        **_expected_meta(image_bytes), "derivatives": True
+    }
+    assert "Обновлено публикаций: 1" in out.getvalue()
@@ -0,0 +1,139 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+
+from blog.images import thumbnail_name
+from blog.models import Post
+from blog.signals import sweep_uploads
+
+
+@pytest.fixture
+def same_image_posts(
+        settings, tmp_path, mixer, user, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_TASKS_EAGER = True
+    buffer = BytesIO()
+    Image.new("RGB", (800, 400), color=(1, 2, 3)).save(buffer, "JPEG")
+    with django_capture_on_commit_callbacks(execute=True):
+        return [
+            mixer.blend(
+                "blog.Post", author=user,
+                image=ImageFile(BytesIO(buffer.getvalue()), name=name),
+            )
+            for name in ("first.jpg", "second.jpg")
+        ]
+
+
+@pytest.mark.django_db
+def test_equal_uploads_share_one_file(same_image_posts, tmp_path):
+    first, second = same_image_posts
+    assert first.image.name == second.image.name == (
+        f"posts_images/{first.image_meta['hash'][:2]}/"
+        f"{first.image_meta['hash']}.jpg"
+    ), (
+        "Убедитесь, что одинаковые изображения сохраняются один раз под"
+        " хешем содержимого."
+    )
+    assert len(list((tmp_path / "posts_images").rglob("*.jpg"))) == 1
+
+
+@pytest.mark.django_db
+def test_file_is_removed_with_last_post(
+        same_image_posts, user_client, django_capture_on_commit_callbacks
+):
+    first, second = same_image_posts
+    name = first.image.name
+    thumbnails = [thumbnail_name(name, 320), thumbnail_name(name, 800, "webp")]
+    assert all(map(default_storage.exists, thumbnails))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user_client.post(f"/posts/{first.id}/delete/")
+    assert default_storage.exists(name), (
+        "Убедитесь, что файл изображения не удаляется, пока на него"
+        " ссылаются другие публикации."
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not default_storage.exists(name), (
+        "Убедитесь, что файл изображения удаляется вместе с последней"
+        " публикацией, которая на него ссылается."
+    )
+    assert not any(map(default_storage.exists, thumbnails))
+
+
+@pytest.mark.django_db
+def test_replaced_image_is_released(
+        same_image_posts, django_capture_on_commit_callbacks
+):
+    first, second = same_image_posts
+    name = first.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        first.image = None
+        first.save()
+    assert default_storage.exists(name)
+    with django_capture_on_commit_callbacks(execute=True):
+        second.image = None
+        second.save()
+    assert not default_storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_reused_file_survives_concurrent_release(
+        same_image_posts, mixer, user, django_capture_on_commit_callbacks
+):
+    name = same_image_posts[0].image.name
+    storage = Post.image.field.storage
+    with storage.open(name) as file:
+        content = file.read()
+    # An equal upload reuses the file; the release checks the references
+    # before the new post is committed.
+    with django_capture_on_commit_callbacks() as callbacks:
+        third = mixer.blend(
+            "blog.Post", author=user,
+            image=ImageFile(BytesIO(content), name="third.jpg"),
+        )
+    assert third.image.name == name
+    assert storage.release(name, lambda: False)
+    for callback in callbacks:
+        callback()
+    assert storage.exists(name), (
+        "Убедитесь, что файл изображения не теряется, если его удаление"
+        " совпало с загрузкой такого же изображения."
+    )
+    with storage.open(name) as file:
+        assert file.read() == content
+
+
+@pytest.mark.django_db
+def test_rolled_back_upload_is_swept(
+        same_image_posts, mixer, user, tmp_path,
+        django_capture_on_commit_callbacks
+):
+    buffer = BytesIO()
+    Image.new("RGB", (300, 200), color=(4, 5, 6)).save(buffer, "JPEG")
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            post = mixer.blend(
+                "blog.Post", author=user,
+                image=ImageFile(buffer, name="rolled_back.jpg"),
+            )
+            raise RuntimeError
+    name = post.image.name
+    storage = Post.image.field.storage
+    assert storage.exists(name)
+    with django_capture_on_commit_callbacks(execute=True):
+        sweep_uploads(max_age=0)
+    assert not storage.exists(name), (
+        "Убедитесь, что файл изображения из отменённой транзакции"
+        " удаляется."
+    )
+    assert storage.exists(same_image_posts[0].image.name)
+    assert not list((tmp_path / ".uploads").iterdir()), (
+        "Убедитесь, что временные копии загрузок не накапливаются."
+    )
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+
+def _walk_pages(client, url, cursor_key):
+    pages = []
+    response = client.get(url)
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        page = response.context["page_obj"]
+        pages.append([post.id for post in page])
+        cursor = getattr(page, cursor_key)
+        if cursor is None:
+            return pages, page
+        response = client.get(url, {"cursor": cursor})
+
+
+@pytest.mark.django_db
+def test_keyset_pages_match_offset_pages(
+        settings, user_client, many_posts_with_published_locations
+):
+    offset_ids = []
+    page_number = 1
+    while True:
+        response = user_client.get("/", {"page": page_number})
+        page = response.context["page_obj"]
+        offset_ids.extend(post.id for post in page)
+        if not page.has_next():
+            break
+        page_number += 1
+
+    settings.BLOG_PAGINATION_MODE = "keyset"
+    pages, last_page = _walk_pages(user_client, "/", "next_cursor")
+    assert all(len(ids) == N_PER_PAGE for ids in pages[:-1])
+    assert [post_id for ids in pages for post_id in ids] == offset_ids, (
+        "Убедитесь, что курсорная пагинация выдаёт публикации в том же"
+        " порядке, что и постраничная."
+    )
+
+    backward = []
+    response = user_client.get(
+        "/", {"cursor": last_page.previous_cursor}
+    )
+    while True:
+        page = response.context["page_obj"]
+        backward.insert(0, [post.id for post in page])
+        if not page.has_previous():
+            break
+        response = user_client.get("/", {"cursor": page.previous_cursor})
+    assert backward == pages[:-1], (
+        "Убедитесь, что ссылка на предыдущую страницу курсорной пагинации"
+        " возвращает те же публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_keyset_page_query_does_not_use_offset(
+        settings, user_client, many_posts_with_published_locations
+):
+    settings.BLOG_PAGINATION_MODE = "keyset"
+    next_cursor = user_client.get("/").context["page_obj"].next_cursor
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/", {"cursor": next_cursor})
+    assert response.status_code == HTTPStatus.OK
+    post_queries = [
+        q["sql"] for q in ctx.captured_queries
+        if "blog_feedentry" in q["sql"]
+    ]
+    assert post_queries and not any(
+        "OFFSET" in sql or "COUNT(*)" in sql for sql in post_queries
+    ), (
+        "Убедитесь, что при курсорной пагинации страница выбирается без"
+        " OFFSET и без подсчёта общего количества публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(user_client):
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что при неверном курсоре возвращается ошибка 404."
+    )
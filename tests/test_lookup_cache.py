@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import USER_KEY, get_cache
+
+
+def _lookup_queries(client, url, table):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    return response, [
+        query["sql"] for query in ctx.captured_queries
+        if query["sql"].startswith("SELECT")
+        and f'FROM "{table}"' in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+def test_category_lookup_is_cached(user_client, post_with_published_location):
+    category = post_with_published_location.category
+    url = f"/category/{category.slug}/"
+    _, first = _lookup_queries(user_client, url, "blog_category")
+    assert len(first) == 1, (
+        "Убедитесь, что категория запрашивается из базы данных не больше"
+        " одного раза за запрос."
+    )
+    response, second = _lookup_queries(user_client, url, "blog_category")
+    assert response.status_code == HTTPStatus.OK
+    assert not second, (
+        "Убедитесь, что категория по её slug берётся из кэша при повторных"
+        " запросах."
+    )
+
+    category.is_published = False
+    category.save()
+    response, _ = _lookup_queries(user_client, url, "blog_category")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    category.is_published = True
+    category.slug = "renamed-category"
+    category.save()
+    assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    response = user_client.get("/category/renamed-category/")
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_author_lookup_is_cached(user_client, another_user):
+    url = f"/profile/{another_user.username}/"
+    _, first = _lookup_queries(user_client, url, "auth_user")
+    # The session user and the profile owner.
+    assert len(first) == 2
+    response, second = _lookup_queries(user_client, url, "auth_user")
+    assert len(second) == 1, (
+        "Убедитесь, что автор профиля берётся из кэша при повторных"
+        " запросах."
+    )
+    profile = response.context["profile"]
+    assert profile == another_user
+    assert profile.date_joined == another_user.date_joined
+    cached = get_cache().get(USER_KEY.format(another_user.username))
+    assert not {"password", "email"} & set(cached), (
+        "Убедитесь, что в кэше не хранятся хеш пароля и адрес почты"
+        " пользователя."
+    )
+
+    old_username = another_user.username
+    another_user.username = "renamed_user"
+    another_user.save()
+    response = user_client.get(f"/profile/{old_username}/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = user_client.get("/profile/renamed_user/")
+    assert response.context["profile"] == another_user
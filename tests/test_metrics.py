@@ -0,0 +1,96 @@
+import re
+import shutil
+
+import pytest
+
+from blog.metrics import REGISTRY
+
+INDEX_REQUESTS = 'blog_requests_total{view="blog:index",status="200"}'
+
+
+def _sample(client, name):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    match = re.search(
+        rf"^{re.escape(name)} (\S+)$", response.content.decode(), re.M
+    )
+    return float(match.group(1)) if match else 0
+
+
+@pytest.mark.django_db
+def test_requests_are_counted_per_url_name(client):
+    before = _sample(client, INDEX_REQUESTS)
+    client.get("/")
+    client.get("/")
+    assert _sample(client, INDEX_REQUESTS) == before + 2, (
+        "Убедитесь, что `/metrics` считает запросы по имени адреса."
+    )
+    text = client.get("/metrics").content.decode()
+    for line in (
+        'blog_request_duration_seconds_bucket{view="blog:index",'
+        'method="GET",le="+Inf"}',
+        'blog_db_queries_count{view="blog:index"}',
+        'blog_cache_requests_total{result="miss"}',
+    ):
+        assert line in text
+
+
+@pytest.mark.django_db
+def test_writes_are_counted(user_client, post_with_published_location):
+    name = 'blog_writes_total{model="comment",action="create"}'
+    before = _sample(user_client, name)
+    user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        data={"text": "Комментарий"},
+    )
+    assert _sample(user_client, name) == before + 1
+
+
+@pytest.mark.django_db
+def test_shared_directory_sums_processes(settings, tmp_path, client):
+    settings.BLOG_METRICS_DIR = str(tmp_path)
+    client.get("/")
+    own = _sample(client, INDEX_REQUESTS)
+    assert own >= 1
+    # Another worker's dump of the same values.
+    shutil.copy(
+        tmp_path / REGISTRY.file_name, tmp_path / "other_worker.json"
+    )
+    assert _sample(client, INDEX_REQUESTS) == own * 2, (
+        "Убедитесь, что в режиме общего каталога `/metrics` суммирует"
+        " значения всех процессов."
+    )
+
+
+def test_forked_process_starts_from_zero(monkeypatch):
+    REGISTRY.metrics["blog_writes_total"].inc("post", "create")
+    monkeypatch.setattr("blog.metrics.os.getpid", lambda: -1)
+    assert not REGISTRY.snapshot()["blog_writes_total"]
+
+
+@pytest.mark.django_db
+def test_metrics_are_not_public(settings, client, mixer):
+    assert client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code == (
+        404
+    ), "Убедитесь, что `/metrics` недоступен посторонним адресам."
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    assert client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code == (
+        200
+    )
+
+
+@pytest.mark.django_db
+def test_queries_are_counted_on_sampled_requests(settings, client):
+    name = 'blog_db_queries_count{view="blog:index"}'
+    settings.BLOG_TIMING_SAMPLE_RATE = 0
+    before = _sample(client, name)
+    client.get("/")
+    assert _sample(client, name) == before, (
+        "Убедитесь, что запросы к БД считаются только для выборки"
+        " HTTP-запросов из `BLOG_TIMING_SAMPLE_RATE`."
+    )
+    assert _sample(client, INDEX_REQUESTS) >= 1
+    settings.BLOG_TIMING_SAMPLE_RATE = 1
+    client.get("/")
+    assert _sample(client, name) == before + 1
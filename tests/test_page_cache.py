@@ -0,0 +1,177 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import cache as cache_module
+from blog.cache import cache_timeout, page_cache_stats
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+@pytest.fixture
+def two_feeds(mixer, user, another_user, published_category,
+              another_category, published_location):
+    first = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True,
+    )
+    second = mixer.blend(
+        "blog.Post", author=another_user, category=another_category,
+        is_published=True,
+    )
+    return first, second
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_served_from_cache(client, two_feeds):
+    first, _ = two_feeds
+    urls = (
+        "/",
+        f"/category/{first.category.slug}/",
+        f"/profile/{first.author.username}/",
+        f"/posts/{first.id}/",
+    )
+    for url in urls:
+        first_response, _ = _get(client, url)
+        second_response, n_queries = _get(client, url)
+        assert n_queries == 0, (
+            f"Убедитесь, что повторный анонимный запрос `{url}` обслуживается"
+            " из кэша без обращений к базе данных."
+        )
+        assert second_response.content == first_response.content
+    assert page_cache_stats() == {"hit": len(urls), "miss": len(urls)}
+
+
+@pytest.mark.django_db
+def test_anonymous_page_key_ignores_unused_parameters(client, two_feeds):
+    _get(client, "/")
+    _get(client, "/?page=1")
+    client.cookies["csrftoken"] = "visitor-token"
+    for url in ("/?utm_source=mail", "/?page=1&utm_source=mail"):
+        _, n_queries = _get(client, url)
+        assert n_queries == 0, (
+            "Убедитесь, что кэш анонимных страниц не зависит от cookie CSRF"
+            f" и от параметров, которые страница не использует: `{url}`."
+        )
+    assert page_cache_stats() == {"hit": 2, "miss": 2}
+
+
+@pytest.mark.django_db
+def test_authenticated_pages_are_not_cached(user_client, two_feeds):
+    _get(user_client, "/")
+    _, n_queries = _get(user_client, "/")
+    assert n_queries > 0
+    assert page_cache_stats() == {"hit": 0, "miss": 0}
+
+
+@pytest.mark.django_db
+def test_comment_invalidates_only_related_pages(
+        mixer, client, two_feeds
+):
+    first, second = two_feeds
+    related = (
+        "/",
+        f"/category/{first.category.slug}/",
+        f"/profile/{first.author.username}/",
+        f"/posts/{first.id}/",
+    )
+    unrelated = (
+        f"/category/{second.category.slug}/",
+        f"/profile/{second.author.username}/",
+        f"/posts/{second.id}/",
+    )
+    for url in related + unrelated:
+        _get(client, url)
+
+    comment = mixer.blend("blog.Comment", post=first, text="Новый отзыв")
+
+    for url in related:
+        response, n_queries = _get(client, url)
+        assert n_queries > 0, (
+            f"Убедитесь, что кэш страницы `{url}` сбрасывается после"
+            " добавления комментария к её публикации."
+        )
+    detail, _ = _get(client, f"/posts/{first.id}/")
+    assert comment.text in detail.content.decode()
+    for url in unrelated:
+        assert _get(client, url)[1] == 0, (
+            f"Убедитесь, что кэш страницы `{url}` не сбрасывается при"
+            " изменении публикаций, которые на ней не показаны."
+        )
+
+
+@pytest.mark.django_db
+def test_category_and_location_changes_invalidate_cards(client, two_feeds):
+    first, second = two_feeds
+    url = f"/profile/{first.author.username}/"
+    _get(client, url)
+
+    first.location.name = "Переименованное место"
+    first.location.save()
+    assert "Переименованное место" in _get(client, url)[0].content.decode()
+
+    first.category.is_published = False
+    first.category.save()
+    response, _ = _get(client, "/")
+    assert first.id not in [post.id for post in response.context["page_obj"]]
+    assert second.id in [post.id for post in response.context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_renamed_commenter_invalidates_post_page(
+        mixer, client, another_user, two_feeds
+):
+    first, _ = two_feeds
+    mixer.blend("blog.Comment", post=first, author=another_user)
+    url = f"/posts/{first.id}/"
+    _get(client, url)
+    another_user.username = "renamed_commenter"
+    another_user.save()
+    assert "@renamed_commenter" in _get(client, url)[0].content.decode(), (
+        "Убедитесь, что страница публикации обновляется, когда автор"
+        " комментария меняет имя."
+    )
+
+
+@pytest.mark.django_db
+def test_category_save_does_not_bump_every_post(
+        monkeypatch, mixer, user, published_category,
+        django_capture_on_commit_callbacks
+):
+    mixer.cycle(30).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    written = []
+    monkeypatch.setattr(
+        cache_module, "_set_versions",
+        lambda names: written.extend(names)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        published_category.title = "Новое название"
+        published_category.save()
+    assert len(written) <= 4, (
+        "Убедитесь, что изменение категории не сбрасывает версию каждой"
+        " её публикации по отдельности."
+    )
+
+
+def test_local_cache_entries_expire_soon(settings, tmp_path):
+    local = settings.BLOG_LOCAL_CACHE_TIMEOUT
+    assert cache_timeout(None) == local
+    assert cache_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT) == local, (
+        "Убедитесь, что с кешем в памяти процесса страницы кешируются"
+        " ненадолго: другие процессы не видят сброса версий."
+    )
+    settings.CACHES = {"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path),
+    }}
+    assert cache_timeout(None) is None
+    assert cache_timeout(settings.BLOG_PAGE_CACHE_TIMEOUT) == (
+        settings.BLOG_PAGE_CACHE_TIMEOUT
+    )
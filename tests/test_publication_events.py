@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import utils
+from blog.models import Task
+from blog.queue import claim, run_task
+
+
+@pytest.fixture
+def publication_events(settings, tmp_path):
+    settings.BLOG_PUBLICATION_EVENTS = True
+    settings.BLOG_TASKS_EAGER = False
+    # The web process and the run_tasks worker, each with its own
+    # instance of one shared cache.
+    shared = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path / "cache"),
+    }
+    settings.CACHES = {"default": shared, "worker": shared}
+
+
+def _index_ids(client):
+    return [post.id for post in client.get("/").context["page_obj"]]
+
+
+@pytest.mark.django_db
+def test_scheduled_post_goes_live_on_event(
+        publication_events, settings, monkeypatch, mixer, client,
+        published_category
+):
+    now = timezone.now()
+    post = mixer.blend(
+        "blog.Post",
+        category=published_category,
+        is_published=True,
+        pub_date=now + timedelta(minutes=5),
+    )
+    event = Task.objects.get(name="blog.publish_due")
+    assert event.run_at == post.pub_date, (
+        "Убедитесь, что для отложенной публикации планируется событие на"
+        " момент её публикации."
+    )
+    assert post.id not in _index_ids(client)
+
+    monkeypatch.setattr(
+        utils.timezone, "now", lambda: now + timedelta(minutes=6)
+    )
+    # Cached until the event, with no time bucket in the key.
+    assert client.get("/").context is None
+
+    settings.BLOG_CACHE_ALIAS = "worker"
+    assert run_task(claim(now=now + timedelta(minutes=6))) == Task.DONE
+    settings.BLOG_CACHE_ALIAS = "default"
+    assert post.id in _index_ids(client), (
+        "Убедитесь, что событие публикации сбрасывает кеш ленты."
+    )
+
+
+@pytest.mark.django_db
+def test_local_cache_keeps_time_buckets(settings, mixer):
+    settings.BLOG_PUBLICATION_EVENTS = True
+    settings.BLOG_FEED_NOW_BUCKET = 30
+    mixer.blend("blog.Post", pub_date=timezone.now() + timedelta(minutes=5))
+    assert not Task.objects.filter(name="blog.publish_due").exists(), (
+        "Убедитесь, что с кешем в памяти процесса события публикации не"
+        " используются: сброс версий в обработчике очереди не виден"
+        " веб-процессам."
+    )
+    assert utils.feed_now().timestamp() % 30 == 0
+
+
+@pytest.mark.django_db
+def test_past_pub_date_schedules_nothing(publication_events, mixer):
+    mixer.blend("blog.Post", pub_date=timezone.now() - timedelta(days=1))
+    assert not Task.objects.filter(name="blog.publish_due").exists()
+
+
+@pytest.mark.django_db
+def test_cached_count_survives_clock(
+        publication_events, settings, monkeypatch, user_client,
+        many_posts_with_published_locations
+):
+    settings.BLOG_PAGINATION_MODE = "cached_count"
+    now = timezone.now()
+    queries = []
+    for seconds in (0, 1):
+        monkeypatch.setattr(
+            utils.timezone, "now", lambda: now + timedelta(seconds=seconds)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            user_client.get("/")
+        queries += [query["sql"] for query in ctx.captured_queries]
+    assert sum("COUNT(*)" in sql for sql in queries) == 1, (
+        "Убедитесь, что кэш количества публикаций не зависит от текущего"
+        " времени в запросе ленты."
+    )
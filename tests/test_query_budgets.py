@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+
+from blog.models import Comment, Post
+
+N_FEW = 3
+N_MANY = 30
+
+# Budgets for a cold cache; they must not depend on the number of posts.
+# Numbered pagination is used since the count-free one skips COUNT(*)
+# on a feed that fits one page.
+ANONYMOUS_BUDGETS = {
+    "/": 2,
+    "/category/{category}/": 3,
+    "/profile/{author}/": 3,
+    "/search/?q=text": 2,
+    "/posts/{post}/": 2,
+    "/posts/{post}/comments/": 2,
+    "/pages/about/": 0,
+    "/pages/rules/": 0,
+    "/auth/login/": 0,
+    "/auth/registration/": 0,
+}
+AUTHOR_BUDGETS = {
+    **{url: budget + 2 for url, budget in ANONYMOUS_BUDGETS.items()},
+    "/posts/create/": 4,
+    "/posts/{post}/edit/": 5,
+    "/posts/{post}/delete/": 4,
+    "/posts/{post}/edit_comment/{comment}/": 3,
+    "/posts/{post}/delete_comment/{comment}/": 3,
+    "/edit_profile/": 2,
+}
+
+
+@pytest.fixture
+def grow_blog(mixer, user, another_user, published_category):
+    # Every post gets its own location and comments alternate authors,
+    # so a lazy relation in a template costs a query per row.
+    def grow(n):
+        missing = n - Post.objects.count()
+        posts = mixer.cycle(missing).blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            location__is_published=True,
+            is_published=True,
+            text=mixer.sequence("Searchable text {0}"),
+        )
+        first = Post.objects.order_by("id").first()
+        mixer.cycle(n - first.comments.count()).blend(
+            "blog.Comment",
+            post=first,
+            author=mixer.sequence(user, another_user),
+        )
+        return posts
+
+    grow(N_FEW)
+    return grow
+
+
+def _url_kwargs(user):
+    post = Post.objects.order_by("id").first()
+    return {
+        "category": post.category.slug,
+        "author": user.username,
+        "post": post.id,
+        "comment": Comment.objects.filter(post=post, author=user).first().id,
+    }
+
+
+def _cold_query_count(client, url, budget, query_budget):
+    for cache in caches.all():
+        cache.clear()
+    with query_budget(budget, f"страница `{url}`") as ctx:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, url
+    return len(ctx)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("client_fixture", "budgets"),
+    [("client", ANONYMOUS_BUDGETS), ("user_client", AUTHOR_BUDGETS)],
+    ids=["anonymous", "author"],
+)
+def test_query_budgets_do_not_grow(
+        request, settings, client_fixture, budgets, user, grow_blog,
+        query_budget
+):
+    settings.BLOG_PAGINATION_MODE = "offset"
+    client = request.getfixturevalue(client_fixture)
+    few = {
+        url: _cold_query_count(
+            client, url.format(**_url_kwargs(user)), budget, query_budget
+        )
+        for url, budget in budgets.items()
+    }
+    grow_blog(N_MANY)
+    for url, budget in budgets.items():
+        n_queries = _cold_query_count(
+            client, url.format(**_url_kwargs(user)), budget, query_budget
+        )
+        assert n_queries == few[url], (
+            f"Убедитесь, что число запросов к базе данных на странице `{url}`"
+            f" не зависит от числа публикаций и комментариев: {few[url]}"
+            f" при {N_FEW} и {n_queries} при {N_MANY}."
+        )
@@ -0,0 +1,82 @@
+import random
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.feed import rebuild_feed
+from blog.models import Category, Location, Post
+
+N_SEEDED_POSTS = 2000
+# The author's own profile reads blog_post, other feeds the feed table.
+FEED_TABLES = ("blog_post", "blog_feedentry")
+
+
+@pytest.fixture
+def seeded_posts(mixer, user, another_user):
+    categories = mixer.cycle(10).blend(
+        Category, is_published=mixer.sequence(lambda i: i % 5 != 0)
+    )
+    locations = mixer.cycle(5).blend(Location)
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            title=f"Post {i}",
+            text="text",
+            pub_date=now - timedelta(minutes=random.randint(-1000, 100000)),
+            author=random.choice((user, another_user)),
+            category=random.choice(categories),
+            location=random.choice(locations),
+            is_published=random.random() < 0.9,
+        )
+        for i in range(N_SEEDED_POSTS)
+    )
+    rebuild_feed()
+    return categories
+
+
+def _post_query_plans(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    plans = {}
+    with connection.cursor() as cursor:
+        for query in ctx.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not any(
+                    f'"{table}"' in sql for table in FEED_TABLES):
+                continue
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plans[sql] = [row[-1] for row in cursor.fetchall()]
+    assert plans
+    return plans
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="планы запросов SQLite"
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "client_fixture", ["user_client", "another_user_client"]
+)
+def test_feeds_use_indexes(request, client_fixture, user, seeded_posts):
+    client = request.getfixturevalue(client_fixture)
+    published_category = next(c for c in seeded_posts if c.is_published)
+    for url in (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    ):
+        for sql, plan in _post_query_plans(client, url).items():
+            full_scans = [
+                step for step in plan if any(
+                    step.startswith(f"SCAN {table}") for table in FEED_TABLES
+                )
+            ]
+            assert not full_scans, (
+                f"Убедитесь, что запрос страницы `{url}` использует индекс"
+                f" таблицы публикаций:\n{sql}\n{plan}"
+            )
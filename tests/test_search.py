@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from django.utils import timezone
+
+from blog.models import Post
+
+
+def _found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.fixture
+def russian_posts(mixer, user, published_category):
+    def blend(title, text, **kwargs):
+        kwargs.setdefault("is_published", True)
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title=title, text=text, **kwargs
+        )
+
+    return {
+        "title": blend("Путешествия по горам", "Рассказ о походе."),
+        "text": blend("Заметка", "Мы долго путешествовали на поезде."),
+        "other": blend("Рецепт пирога", "Мука, яйца и сахар."),
+        "hidden": blend(
+            "Путешествие в будущее", "Черновик.", is_published=False
+        ),
+        "future": blend(
+            "Путешествие завтра", "Скоро.",
+            pub_date=timezone.now() + timedelta(days=1),
+        ),
+    }
+
+
+@pytest.mark.django_db
+def test_search_stems_ranks_and_filters(client, russian_posts):
+    found = _found(client, "путешествие")
+    assert found == [russian_posts["title"].id, russian_posts["text"].id], (
+        "Убедитесь, что поиск находит разные формы слова, ставит совпадения"
+        " в заголовке выше совпадений в тексте и не показывает скрытые и"
+        " отложенные публикации."
+    )
+    assert _found(client, "") == []
+    assert _found(client, "!!!") == []
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, russian_posts):
+    post = russian_posts["other"]
+    assert _found(client, "пироги") == [post.id]
+    post.title = "Рецепт торта"
+    post.save()
+    assert _found(client, "пироги") == []
+    assert _found(client, "торты") == [post.id]
+    post.delete()
+    assert _found(client, "торты") == []
+
+
+@pytest.mark.django_db
+def test_admin_uses_search_index(admin_user, russian_posts):
+    request = RequestFactory().get("/admin/blog/post/")
+    request.user = admin_user
+    queryset, may_have_duplicates = site._registry[Post].get_search_results(
+        request, Post.objects.all(), "путешествие"
+    )
+    assert not may_have_duplicates
+    assert set(queryset) == {
+        russian_posts[key] for key in ("title", "text", "hidden", "future")
+    }
@@ -0,0 +1,73 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def timing_enabled(settings):
+    settings.BLOG_TIMING_SAMPLE_RATE = 1.0
+    settings.BLOG_SERVER_TIMING_HEADER = True
+    return settings
+
+
+@pytest.mark.django_db
+def test_server_timing_header(
+        timing_enabled, user_client, post_with_published_location
+):
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get("/")
+    header = response.headers.get("Server-Timing", "")
+    for metric in ("db;dur=", "view;dur=", "template;dur=", "total;dur="):
+        assert metric in header, (
+            "Убедитесь, что заголовок `Server-Timing` содержит время работы"
+            f" с базой данных, представления и шаблонов: `{header}`."
+        )
+    assert f'queries;desc="{len(ctx)}"' in header, (
+        "Убедитесь, что заголовок `Server-Timing` содержит число запросов"
+        " к базе данных."
+    )
+    assert re.search(r'cache;desc="hit=\d+ miss=[1-9]\d*"', header)
+
+
+@pytest.mark.django_db
+def test_page_cache_hit_is_reported(
+        timing_enabled, client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    client.get(url)
+    header = client.get(url).headers["Server-Timing"]
+    assert 'queries;desc="0"' in header
+    assert 'cache;desc="hit=1 miss=0"' in header
+
+
+@pytest.mark.django_db
+def test_timings_are_logged(timing_enabled, caplog, client):
+    logger = logging.getLogger("blog.timing")
+    logger.addHandler(caplog.handler)
+    try:
+        client.get("/")
+    finally:
+        logger.removeHandler(caplog.handler)
+    records = [r for r in caplog.records if r.name == "blog.timing"]
+    assert len(records) == 1
+    data = json.loads(records[0].getMessage())
+    assert data["view"] == "blog:index"
+    assert data["status"] == 200
+    assert data["total_ms"] >= data["db_ms"]
+
+
+@pytest.mark.django_db
+def test_unsampled_requests_are_not_measured(timing_enabled, caplog, client):
+    timing_enabled.BLOG_TIMING_SAMPLE_RATE = 0
+    logger = logging.getLogger("blog.timing")
+    logger.addHandler(caplog.handler)
+    try:
+        response = client.get("/")
+    finally:
+        logger.removeHandler(caplog.handler)
+    assert "Server-Timing" not in response.headers
+    assert not [r for r in caplog.records if r.name == "blog.timing"]
@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+
+from blogicum.sqlite3.base import DatabaseWrapper
+
+WRITERS = 4
+
+
+@pytest.fixture
+def connect(tmp_path, django_db_blocker):
+    # A file database: the in-memory test one has no WAL and no locks.
+    def connect(**options):
+        settings_dict = {**connection.settings_dict}
+        settings_dict.update(
+            NAME=str(tmp_path / "db.sqlite3"),
+            OPTIONS={**settings_dict["OPTIONS"], **options},
+        )
+        return DatabaseWrapper(settings_dict)
+
+    with django_db_blocker.unblock():
+        setup = connect()
+        with setup.cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (n integer)")
+            cursor.execute("INSERT INTO counter VALUES (0)")
+        setup.close()
+        yield connect
+
+
+@contextmanager
+def atomic(db):
+    db.set_autocommit(
+        False, force_begin_transaction_with_broken_autocommit=True
+    )
+    try:
+        yield db.cursor()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.set_autocommit(True)
+
+
+def _value(db, sql):
+    with db.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()[0]
+
+
+def _increment(connect, barrier, errors, read_first=False, **options):
+    db = connect(**options)
+    try:
+        if not read_first:
+            barrier.wait()
+        with atomic(db) as cursor:
+            cursor.execute("SELECT n FROM counter")
+            n = cursor.fetchone()[0]
+            if read_first:
+                barrier.wait()
+            time.sleep(0.05)
+            cursor.execute("UPDATE counter SET n = %s", [n + 1])
+    except OperationalError as error:
+        errors.append(error)
+    finally:
+        db.close()
+
+
+def _run_writers(connect, **kwargs):
+    barrier = threading.Barrier(WRITERS, timeout=5)
+    errors = []
+    threads = [
+        threading.Thread(
+            target=_increment, args=(connect, barrier, errors), kwargs=kwargs
+        )
+        for _ in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db = connect()
+    try:
+        return _value(db, "SELECT n FROM counter"), errors
+    finally:
+        db.close()
+
+
+def test_profile_pragmas(connect):
+    db = connect()
+    try:
+        assert _value(db, "PRAGMA journal_mode") == "wal", (
+            "Убедитесь, что SQLite работает в режиме журнала WAL."
+        )
+        assert _value(db, "PRAGMA synchronous") == 1
+        assert _value(db, "PRAGMA temp_store") == 2
+        assert _value(db, "PRAGMA cache_size") == -64 * 1024
+        assert _value(db, "PRAGMA mmap_size") > 0
+        assert _value(db, "PRAGMA busy_timeout") == 20000
+    finally:
+        db.close()
+
+
+def test_reads_do_not_wait_for_writes(connect):
+    # The shipped profile, "timeout" included.
+    writer, reader = connect(), connect()
+    assert reader.settings_dict["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+    try:
+        with atomic(writer) as cursor:
+            cursor.execute("UPDATE counter SET n = 1")
+            started = time.monotonic()
+            assert _value(reader, "SELECT n FROM counter") == 0
+            assert time.monotonic() - started < 1, (
+                "Убедитесь, что чтение не ждёт окончания транзакции записи."
+            )
+        assert _value(reader, "SELECT n FROM counter") == 1
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_read_only_atomic_blocks_take_the_write_lock(connect):
+    # Which is why reads stay outside atomic().
+    reader, errors = connect(), []
+    writer = threading.Thread(
+        target=_increment,
+        args=(connect, threading.Barrier(1), errors),
+    )
+    try:
+        with atomic(reader) as cursor:
+            cursor.execute("SELECT n FROM counter")
+            cursor.fetchall()
+            writer.start()
+            writer.join(0.5)
+            assert writer.is_alive(), (
+                "Убедитесь, что блок atomic() занимает блокировку записи"
+                " с самого начала."
+            )
+        writer.join()
+        assert not errors
+        assert _value(reader, "SELECT n FROM counter") == 1
+    finally:
+        reader.close()
+
+
+def test_atomic_requests_are_refused(connect):
+    db = connect()
+    db.settings_dict["ATOMIC_REQUESTS"] = True
+    with pytest.raises(ImproperlyConfigured):
+        db.get_connection_params()
+
+
+def test_concurrent_writes_wait_for_the_lock(connect):
+    assert _run_writers(connect) == (WRITERS, []), (
+        "Убедитесь, что одновременные транзакции записи дожидаются"
+        " блокировки, а не завершаются ошибкой `database is locked`."
+    )
+
+
+def test_deferred_writes_fail(connect):
+    # What "transaction_mode" prevents: every transaction reads before
+    # any of them writes.
+    value, errors = _run_writers(
+        connect, read_first=True, transaction_mode=None
+    )
+    assert errors and value == WRITERS - len(errors)
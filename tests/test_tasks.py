@@ -0,0 +1,159 @@
+import re
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core import mail
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+from blog.images import thumbnail_name
+from blog.models import Task
+from blog.queue import claim, enqueue, task
+
+calls = []
+
+
+@task("tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task("tests.broken", max_attempts=2)
+def broken():
+    raise ValueError("broken")
+
+
+@pytest.fixture(autouse=True)
+def worker_queue(settings):
+    settings.BLOG_TASKS_EAGER = False
+    calls.clear()
+
+
+def _run_worker():
+    out = StringIO()
+    call_command("run_tasks", once=True, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_worker_runs_queued_task():
+    queued = enqueue(record, value=1)
+    assert calls == [], (
+        "Убедитесь, что поставленная в очередь задача не выполняется сразу."
+    )
+    assert "Задач выполнено: 1" in _run_worker()
+    assert calls == [1]
+    queued.refresh_from_db()
+    assert queued.status == Task.DONE and queued.attempts == 1
+
+
+@pytest.mark.django_db
+def test_idempotency_key():
+    first = enqueue(record, key="same", value=1)
+    assert enqueue(record, key="same", value=2) == first, (
+        "Убедитесь, что задача с ключом ожидающей задачи повторно не"
+        " ставится в очередь."
+    )
+    _run_worker()
+    assert calls == [1]
+    assert enqueue(record, key="same", value=3) != first
+
+
+@pytest.mark.django_db
+def test_task_is_claimed_once():
+    queued = enqueue(record, value=1)
+    assert claim().pk == queued.pk
+    assert claim() is None, (
+        "Убедитесь, что задачу может взять только один исполнитель."
+    )
+    # The worker died: the lease runs out and the task is given away.
+    assert claim(
+        now=timezone.now() + timedelta(days=1)
+    ).pk == queued.pk
+
+
+@pytest.mark.django_db
+def test_failed_task_is_retried(settings):
+    settings.BLOG_TASK_RETRY_DELAY = 0
+    queued = enqueue(broken)
+    assert "отложено для повтора: 1, с ошибкой: 1" in _run_worker()
+    queued.refresh_from_db()
+    assert queued.status == Task.FAILED, (
+        "Убедитесь, что задача повторяется до `max_attempts` раз и затем"
+        " помечается невыполненной."
+    )
+    assert queued.attempts == 2
+    assert "ValueError: broken" in queued.error
+
+
+@pytest.mark.django_db
+def test_password_reset_mail_is_queued(client, mixer):
+    user = mixer.blend("auth.User", email="reader@example.com")
+    client.post("/auth/password_reset/", {"email": "reader@example.com"})
+    assert len(mail.outbox) == 0, (
+        "Убедитесь, что письмо для сброса пароля отправляется из очереди"
+        " задач, а не во время запроса."
+    )
+    queued = Task.objects.get(name="blog.send_password_reset")
+    assert queued.payload["user_id"] == user.pk
+    assert not {"uid", "token", "body"} & set(queued.payload) and not any(
+        key in queued.payload["context"] for key in ("uid", "token", "user")
+    ), (
+        "Убедитесь, что в задаче не хранятся ссылка для сброса пароля и"
+        " текст письма."
+    )
+    _run_worker()
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ["reader@example.com"]
+    link = re.search(r"/auth/reset/[^/]+/[^/]+/", mail.outbox[0].body)
+    response = client.get(link.group(), follow=True)
+    assert response.context["validlink"], (
+        "Убедитесь, что ссылка в письме, созданная исполнителем задач,"
+        " действительна."
+    )
+
+
+@pytest.mark.django_db
+def test_finished_tasks_are_purged(settings):
+    settings.BLOG_TASK_RETRY_DELAY = 0
+    enqueue(record, value=1)
+    failed = enqueue(broken)
+    _run_worker()
+    Task.objects.update(
+        created_at=timezone.now() - timedelta(
+            seconds=settings.BLOG_TASK_KEEP_DONE + 1
+        )
+    )
+    fresh = enqueue(record, value=2)
+    _run_worker()
+    assert set(Task.objects.values_list("pk", flat=True)) == {
+        fresh.pk, failed.pk
+    }, (
+        "Убедитесь, что выполненные задачи удаляются из очереди через"
+        " `BLOG_TASK_KEEP_DONE` секунд, а невыполненные остаются."
+    )
+
+
+@pytest.mark.django_db
+def test_image_derivatives_are_queued(
+        settings, tmp_path, mixer, user, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = tmp_path
+    buffer = BytesIO()
+    Image.new("RGB", (700, 350)).save(buffer, "JPEG")
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend(
+            "blog.Post", author=user, image=ImageFile(buffer, name="q.jpg")
+        )
+    name = thumbnail_name(post.image.name, 320)
+    assert not default_storage.exists(name)
+    _run_worker()
+    assert default_storage.exists(name), (
+        "Убедитесь, что копии изображения создаёт обработчик очереди."
+    )
+    post.refresh_from_db()
+    assert post.image_meta["derivatives"] is True
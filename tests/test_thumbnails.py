@@ -0,0 +1,129 @@
+from io import BytesIO, StringIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.constants import THUMBNAIL_WIDTHS
+from blog.images import thumbnail_name
+from blog.models import Post
+
+
+def _wide_image():
+    buffer = BytesIO()
+    Image.new("RGB", (2000, 1000), color=(200, 100, 50)).save(buffer, "JPEG")
+    return ImageFile(buffer, name="wide.jpg")
+
+
+@pytest.fixture
+def wide_image_post(
+        settings, tmp_path, mixer, user, published_category,
+        django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_TASKS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        return mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            is_published=True,
+            image=_wide_image(),
+        )
+
+
+def _soup(client, url):
+    return BeautifulSoup(client.get(url).content.decode(), "html.parser")
+
+
+@pytest.mark.django_db
+def test_thumbnails_are_made_on_upload(wide_image_post):
+    for width in THUMBNAIL_WIDTHS:
+        name = thumbnail_name(wide_image_post.image.name, width)
+        assert default_storage.exists(name), (
+            "Убедитесь, что при загрузке изображения создаются его"
+            " уменьшенные копии."
+        )
+        with default_storage.open(name) as file, Image.open(file) as image:
+            assert image.size == (width, width // 2)
+    for width in (*THUMBNAIL_WIDTHS, 2000):
+        name = thumbnail_name(wide_image_post.image.name, width, "webp")
+        assert default_storage.exists(name), (
+            "Убедитесь, что при загрузке изображения создаются его копии"
+            " в формате WebP."
+        )
+        with default_storage.open(name) as file, Image.open(file) as image:
+            assert image.format == "WEBP"
+            assert image.size == (width, width // 2)
+
+
+@pytest.mark.django_db
+def test_upload_does_not_wait_for_encoding(
+        settings, tmp_path, mixer, user
+):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_TASKS_EAGER = True
+    post = mixer.blend("blog.Post", author=user, image=_wide_image())
+    assert not default_storage.exists(
+        thumbnail_name(post.image.name, 2000, "webp")
+    ), (
+        "Убедитесь, что копии изображения создаются после фиксации"
+        " транзакции, а не во время сохранения публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_card_uses_picture(client, wide_image_post):
+    soup = _soup(client, "/")
+    picture = soup.find("picture")
+    assert picture is not None, (
+        "Убедитесь, что изображение в карточке публикации выводится в"
+        " элементе `<picture>`."
+    )
+    assert len(picture.find_all("img")) == 1
+    webp = picture.find("source", type="image/webp")
+    assert webp is not None, (
+        "Убедитесь, что в `<picture>` есть источник в формате WebP."
+    )
+    assert [
+        candidate.split()[0].endswith(
+            thumbnail_name(wide_image_post.image.name, width, "webp")
+        )
+        for candidate, width in zip(
+            webp["srcset"].split(","), (*THUMBNAIL_WIDTHS, 2000)
+        )
+    ] == [True] * (len(THUMBNAIL_WIDTHS) + 1)
+
+    img = picture.find("img")
+    assert img["width"] == "2000" and img["height"] == "1000"
+    assert img["loading"] == "lazy"
+    widths = [
+        int(candidate.split()[1][:-1]) for candidate in img["srcset"].split(",")
+    ]
+    assert widths == [*THUMBNAIL_WIDTHS, 2000]
+    assert img["src"].endswith(
+        thumbnail_name(wide_image_post.image.name, 640)
+    )
+
+
+@pytest.mark.django_db
+def test_posts_without_derivatives_are_backfilled(client, wide_image_post):
+    # A post uploaded before the derivatives were encoded.
+    Post.objects.filter(pk=wide_image_post.pk).update(image_meta={})
+    name = thumbnail_name(wide_image_post.image.name, 2000, "webp")
+    default_storage.delete(name)
+    soup = _soup(client, f"/posts/{wide_image_post.id}/")
+    assert soup.find("picture") is None
+    assert soup.find("img", src=wide_image_post.image.url) is not None, (
+        "Убедитесь, что до создания копий выводится исходное изображение."
+    )
+    call_command("backfill_image_meta", workers=1, stdout=StringIO())
+    assert default_storage.exists(name)
+    wide_image_post.refresh_from_db()
+    assert wide_image_post.image_meta["derivatives"] is True
+    assert _soup(
+        client, f"/posts/{wide_image_post.id}/"
+    ).find("picture") is not None